@@ -12,6 +12,8 @@
 A breakdown app which shows what in the scene is out of date.
 """
 
+import sys
+
 from sgtk.platform import Application
 
 
@@ -26,6 +28,19 @@ class MultiBreakdown(Application):
             "Scene Breakdown...", cb, {"short_name": "breakdown"}
         )
 
+        # headless report, for batch sessions
+        if not self.engine.has_ui:
+            self.engine.register_command(
+                "Scene Breakdown Report",
+                self._run_report_command,
+                {
+                    "short_name": "breakdown_report",
+                    "description": "Prints a JSON report of the out of date items in "
+                    "the scene. Pass --update to update them, and a file path to "
+                    "write the report to instead of printing it.",
+                },
+            )
+
     @property
     def context_change_allowed(self):
         """
@@ -33,6 +48,21 @@ class MultiBreakdown(Application):
         """
         return True
 
+    def post_context_change(self, old_context, new_context):
+        """
+        Runs after a context change.
+
+        The publish data cached for the scene and the memoized template
+        matches are discarded, results computed for the previous context
+        shouldn't be reused in the new one.
+
+        :param old_context: The context being changed away from.
+        :param new_context: The new context being changed to.
+        """
+        tk_multi_breakdown = self.import_module("tk_multi_breakdown")
+        tk_multi_breakdown.get_publish_cache().invalidate()
+        tk_multi_breakdown.get_template_matcher(self.sgtk).clear()
+
     def show_breakdown_dialog(self):
         """
         Show the breakdown UI as a dialog.
@@ -175,6 +205,126 @@ class MultiBreakdown(Application):
             "hook_get_version_number", template=template, curr_fields=fields
         )
 
+    def compute_highest_versions(self, items):
+        """
+        Given a list of breakdown items, return the highest version number found
+        for each of them.
+
+        This is the bulk equivalent of compute_highest_version(). Items that share
+        the same template and the same fields (ignoring the version and any abstract
+        fields) are only scanned on disk once, which makes this method considerably
+        faster on scenes where many nodes are pointing at the same publishes.
+
+        >>> items = breakdown_app.analyze_scene()
+        >>> latest_versions = breakdown_app.compute_highest_versions(items)
+        >>> for (item, latest_version) in zip(items, latest_versions):
+        ...     print(item["node_name"], latest_version)
+
+        :param items: List of dictionaries, as returned by analyze_scene(). Each
+                      dictionary needs a template and a fields key.
+        :returns: List of highest version numbers, in the same order as the items.
+                  None is returned for items where no files could be found on disk.
+        """
+        return self.execute_hook_method(
+            "hook_get_version_number", "execute_batch", items=items
+        )
+
+    def get_cache_stats(self):
+        """
+        Returns statistics about the caches used by the breakdown.
+
+        :returns: Dictionary keyed by cache name, each value being a dictionary
+                  of statistics, for example hits and misses counters.
+        """
+        tk_multi_breakdown = self.import_module("tk_multi_breakdown")
+        stats = {
+            "directory_listing": tk_multi_breakdown.get_directory_cache().stats(),
+            "publish": tk_multi_breakdown.get_publish_cache().stats(),
+            "template_matching": tk_multi_breakdown.get_template_matcher(
+                self.sgtk
+            ).stats(),
+            "thumbnail": tk_multi_breakdown.get_thumbnail_cache().stats(),
+        }
+        persistent_publish_cache = tk_multi_breakdown.get_persistent_publish_cache()
+        if persistent_publish_cache:
+            stats["persistent_publish"] = persistent_publish_cache.stats()
+        return stats
+
+    def generate_report(self, update=False):
+        """
+        Analyzes the scene and returns a report of the items which are out of date,
+        optionally updating them to their latest version. No UI is involved, so
+        this can be used in batch sessions, for example on the farm:
+
+        >>> report = breakdown_app.generate_report()
+        >>> if report["summary"]["out_of_date"]:
+        ...     print("Scene is out of date!")
+
+        The same report is available as a command, printing the report as JSON.
+
+        :param bool update: Whether the out of date items should be updated
+        :returns: Dictionary with items and summary keys. Each item is a dictionary
+                  with node, type, path, version, latest_version, up_to_date and
+                  error keys, plus an updated_path key if the item was updated.
+                  The summary holds total, up_to_date, out_of_date, unpublished,
+                  unresolved and updated counts.
+        """
+        tk_multi_breakdown = self.import_module("tk_multi_breakdown")
+        return tk_multi_breakdown.build_report(self, update=update)
+
+    def _run_report_command(self, *args):
+        """
+        Callback of the report command.
+
+        :param args: Command line arguments, --update to update the out of date
+                     items and an optional path to write the JSON report to.
+        """
+        tk_multi_breakdown = self.import_module("tk_multi_breakdown")
+        report = tk_multi_breakdown.format_report(
+            self.generate_report(update="--update" in args)
+        )
+
+        output_paths = [arg for arg in args if not arg.startswith("--")]
+        if output_paths:
+            with open(output_paths[0], "w") as f:
+                f.write(report)
+        else:
+            sys.stdout.write(report + "\n")
+            sys.stdout.flush()
+
+    def get_timing_spans(self, correlation_id=None, phase=None):
+        """
+        Returns the timing spans recorded for the phases of the breakdown.
+
+        Spans are recorded for the scene scan, the template matching, the Shotgun
+        queries and the version resolution of each scene analysis, for the status
+        and thumbnail of each listed item, and for the updates done in the UI.
+        All the spans of the same scene analysis or update share a correlation id:
+
+        >>> items = breakdown_app.analyze_scene()
+        >>> spans = breakdown_app.get_timing_spans(items[0]["scan_id"])
+
+        :param str correlation_id: Only return the spans of this analysis or update
+        :param str phase: Only return the spans of this phase, for example query
+        :returns: List of dictionaries with phase, id, start, duration and thread
+                  keys, oldest first. Some spans also have an items key holding
+                  the number of items processed.
+        """
+        tk_multi_breakdown = self.import_module("tk_multi_breakdown")
+        return tk_multi_breakdown.get_span_recorder().get_spans(correlation_id, phase)
+
+    def get_timing_summary(self, correlation_id=None):
+        """
+        Returns the time spent in each phase of the breakdown.
+
+        :param str correlation_id: Only summarize the spans of this analysis or
+                                   update. Defaults to the last one.
+        :returns: Dictionary keyed by phase, each value being a dictionary with
+                  count, total and max keys, durations being in seconds.
+        """
+        recorder = self.import_module("tk_multi_breakdown").get_span_recorder()
+        return recorder.get_summary(correlation_id or recorder.last_id)
+
     def update_item(self, node_type, node_name, template, fields):
         """
         Request that the breakdown updates an given node with a new version.
@@ -196,3 +346,34 @@ class MultiBreakdown(Application):
 
         # call out to hook
         return self.execute_hook_method("hook_scene_operations", "update", items=[item])
+
+    def update_items(self, items):
+        """
+        Request that the breakdown updates many nodes to new versions at once.
+
+        This is the bulk equivalent of update_item(). All the target paths are
+        built and validated first, then the valid ones are sent to the scene
+        operations hook in a single update call, so the hook can batch its work.
+
+        >>> items = breakdown_app.analyze_scene()
+        >>> latest_versions = breakdown_app.compute_highest_versions(items)
+        >>> updates = []
+        >>> for (item, latest_version) in zip(items, latest_versions):
+        ...     if item["template"] and latest_version > item["fields"]["version"]:
+        ...         fields = dict(item["fields"], version=latest_version)
+        ...         updates.append(dict(item, fields=fields))
+        >>> for result in breakdown_app.update_items(updates):
+        ...     if not result["updated"]:
+        ...         print(result["node"], result["error"])
+
+        :param items: List of dictionaries with node_type, node_name, template and
+                      fields keys, as passed to update_item(). Items returned by
+                      analyze_scene() with updated fields can be used as such.
+        :returns: List of dictionaries, in the same order as the items, with node,
+                  type, path, updated and error keys. updated is True if the item
+                  was sent to the hook, otherwise error holds the reason why not:
+                  the path couldn't be built or doesn't exist on disk, or the
+                  hook failed.
+        """
+        tk_multi_breakdown = self.import_module("tk_multi_breakdown")
+        return tk_multi_breakdown.update_breakdown_items(self, items)
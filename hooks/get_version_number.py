@@ -16,6 +16,9 @@ HookBaseClass = sgtk.get_hook_baseclass()
 # the template key we use to find the version number
 VERSION_KEY = "version"
 
+# the maximum number of values passed to a single Shotgun "in" filter
+SG_FILTER_CHUNK_SIZE = 200
+
 
 class GetVersionNumber(HookBaseClass):
     """
@@ -48,26 +51,10 @@ class GetVersionNumber(HookBaseClass):
             # potentially a HUGE glob, so may be slow...
             # todo: better support for sequence iterations
             #       by using the abstract iteration methods
-
-            # first, find all abstract (Sequence) keys from the template:
-            abstract_keys = set()
-            for key_name, key in template.keys.items():
-                if key.is_abstract:
-                    abstract_keys.add(key_name)
-
-            # skip keys are all abstract keys + 'version' & 'eye' and 'camera_version' & 'Step' if a camera
-            if "camera_version" in curr_fields:
-                # set the version key
-                VERSION_KEY = "camera_version"            
-                skip_keys = [k for k in abstract_keys] + [VERSION_KEY, "eye", "version", "Step"]
-            else:
-                VERSION_KEY = "version"
-                skip_keys = [k for k in abstract_keys] + [VERSION_KEY, "eye"]
+            version_key, skip_keys = self._get_version_keys(template, curr_fields)
 
             # then find all files, skipping these keys
-            all_versions = self.sgtk.paths_from_template(
-                template, curr_fields, skip_keys=skip_keys
-            )
+            all_versions = self._paths_from_template(template, curr_fields, skip_keys)
 
             # if we didn't find anything then something has gone wrong with our
             # logic as we should have at least one file so error out:
@@ -76,11 +63,9 @@ class GetVersionNumber(HookBaseClass):
                 raise TankError("Failed to find any files!")
 
             # now look for the highest version number...
-            highest_version = 0
-            for ver in all_versions:
-                curr_fields = template.get_fields(ver)
-                if curr_fields[VERSION_KEY] > highest_version:
-                    highest_version = curr_fields[VERSION_KEY]
+            highest_version = self._get_highest_version(
+                template, version_key, all_versions
+            )
         else:
             # we're getting the latest version directly from Shotgun using info Publish data
             if kwargs.get('sg_data') is not None:
@@ -104,3 +89,253 @@ class GetVersionNumber(HookBaseClass):
                             highest_version = version_number
 
         return highest_version
+
+    def execute_batch(self, items, **kwargs):
+        """
+        Batch entry point, resolving the highest version for many items at once.
+
+        Items are grouped by template and by the values of all the fields which
+        are not skipped when scanning for versions, so each distinct group is
+        only scanned on disk once no matter how many scene nodes reference it.
+
+        :param list items: List of dictionaries with a ``template`` and a ``fields``
+                           key, and optionally a ``sg_data`` key, as returned by
+                           the app's ``analyze_scene()`` method.
+
+        :returns: List of highest version numbers, in the same order as the items.
+                  ``None`` is returned for items where no files could be found.
+        :rtype: list
+        """
+        self._app = self.parent
+        highest_versions = [None] * len(items)
+
+        # group the items sharing the same template and non-version fields
+        groups = {}
+        published_indices = []
+        for index, item in enumerate(items):
+            template = item.get("template")
+            curr_fields = item.get("fields")
+
+            if template is None:
+                # resolved from Shotgun in bulk below
+                published_indices.append(index)
+                continue
+
+            version_key, skip_keys = self._get_version_keys(template, curr_fields)
+            group_fields = tuple(
+                sorted(
+                    (k, v) for (k, v) in curr_fields.items() if k not in skip_keys
+                )
+            )
+            group_key = (template.name, version_key, group_fields)
+            groups.setdefault(group_key, []).append(index)
+
+        # now scan the disk once per group
+        for (template_name, version_key, _), indices in groups.items():
+            template = items[indices[0]]["template"]
+            curr_fields = items[indices[0]]["fields"]
+            _, skip_keys = self._get_version_keys(template, curr_fields)
+
+            all_versions = self._paths_from_template(template, curr_fields, skip_keys)
+            if not all_versions:
+                self._app.log_warning(
+                    "Failed to find any files for template %s and fields %s!"
+                    % (template_name, curr_fields)
+                )
+                continue
+
+            highest_version = self._get_highest_version(
+                template, version_key, all_versions
+            )
+            for index in indices:
+                highest_versions[index] = highest_version
+
+        # items without a template get their latest version from Shotgun
+        published_versions = self._get_highest_published_versions(
+            [items[index].get("sg_data") for index in published_indices]
+        )
+        for (index, highest_version) in zip(published_indices, published_versions):
+            highest_versions[index] = highest_version
+
+        tk_multi_breakdown = self._app.import_module("tk_multi_breakdown")
+        self._app.log_debug(
+            "Directory listing cache: %s"
+            % tk_multi_breakdown.get_directory_cache().stats()
+        )
+        return highest_versions
+
+    def _paths_from_template(self, template, curr_fields, skip_keys):
+        """
+        Finds all the files on disk matching the template and fields.
+
+        The scan goes through the app's directory listing cache, so each publish
+        directory is only listed once per session unless its content changes.
+
+        :param template: Template object to search for
+        :param dict curr_fields: A complete set of fields for the template
+        :param list skip_keys: Keys to search all values for
+
+        :returns: List of matching paths
+        """
+        tk_multi_breakdown = self._app.import_module("tk_multi_breakdown")
+        return tk_multi_breakdown.paths_from_template(
+            template, curr_fields, skip_keys=skip_keys
+        )
+
+    def _get_highest_published_versions(self, sg_data_list):
+        """
+        Returns the highest published version number for a list of publishes.
+
+        Rather than querying Shotgun once per publish, the publishes are grouped
+        per project and the PublishedFiles sharing their names and types are
+        retrieved in a few chunked queries, limited to the entities and types the
+        publishes are linked to. The highest version is then computed locally
+        for each (project, entity, task, published_file_type, name) tuple.
+
+        :param list sg_data_list: List of Shotgun publish dictionaries, as stored
+                                  in the sg_data key of the breakdown items. ``None``
+                                  entries are allowed.
+
+        :returns: List of highest version numbers, in the same order as the publishes.
+                  -1 is returned for ``None`` entries.
+        :rtype: list
+        """
+        highest_versions = [-1] * len(sg_data_list)
+
+        def _id(entity):
+            # the entity field can link to several entity types, so entities
+            # are identified by their type and id
+            return (entity["type"], entity["id"]) if entity else None
+
+        def _publish_key(sg_data):
+            return (
+                _id(sg_data.get("project")),
+                _id(sg_data.get("entity")),
+                _id(sg_data.get("task")),
+                _id(sg_data.get("published_file_type")),
+                sg_data.get("name"),
+            )
+
+        # collect the publish names and types to look for, per project
+        projects = {}
+        for (index, sg_data) in enumerate(sg_data_list):
+            if sg_data is None:
+                continue
+            project_data = projects.setdefault(
+                _id(sg_data.get("project")),
+                {
+                    "project": sg_data.get("project"),
+                    "names": set(),
+                    "types": {},
+                    "entities": {},
+                },
+            )
+            project_data["names"].add(sg_data.get("name"))
+            entity = sg_data.get("entity")
+            project_data["entities"][_id(entity)] = entity
+            if "published_file_type" in sg_data:
+                published_file_type = sg_data["published_file_type"]
+                project_data["types"][_id(published_file_type)] = published_file_type
+
+        # query the publishes and keep track of the highest version per tuple
+        latest_versions = {}
+        sg_fields = [
+            "project",
+            "entity",
+            "task",
+            "published_file_type",
+            "name",
+            "version_number",
+        ]
+        for project_data in projects.values():
+            names = sorted(project_data["names"], key=lambda name: name or "")
+            for i in range(0, len(names), SG_FILTER_CHUNK_SIZE):
+                sg_filter = [
+                    ["project", "is", project_data["project"]],
+                    ["name", "in", names[i : i + SG_FILTER_CHUNK_SIZE]],
+                    self._get_link_filter("entity", project_data["entities"]),
+                ]
+                if project_data["types"]:
+                    sg_filter.append(
+                        self._get_link_filter(
+                            "published_file_type", project_data["types"]
+                        )
+                    )
+
+                for p in self._app.shotgun.find("PublishedFile", sg_filter, sg_fields):
+                    key = _publish_key(p)
+                    version_number = p.get("version_number")
+                    if version_number is None:
+                        version_number = -1
+                    if version_number > latest_versions.get(key, -1):
+                        latest_versions[key] = version_number
+
+        for (index, sg_data) in enumerate(sg_data_list):
+            if sg_data is not None:
+                highest_versions[index] = latest_versions.get(_publish_key(sg_data), -1)
+
+        return highest_versions
+
+    def _get_link_filter(self, field, entities):
+        """
+        Returns the Shotgun filter matching publishes linked to any of the
+        given entities through a field.
+
+        :param str field: Entity field of the publishes, entity for example
+        :param dict entities: Entity dictionaries keyed by (type, id), with a
+                              None entry for publishes not linked through the field
+        :returns: Shotgun filter
+        """
+        linked_entities = [entity for entity in entities.values() if entity]
+        if None not in entities:
+            return [field, "in", linked_entities]
+        if not linked_entities:
+            return [field, "is", None]
+        return {
+            "filter_operator": "any",
+            "filters": [[field, "in", linked_entities], [field, "is", None]],
+        }
+
+    def _get_version_keys(self, template, curr_fields):
+        """
+        Returns the version key for the given fields and the list of keys
+        which should be skipped when scanning the disk for versions.
+
+        :param template: Template object to calculate for
+        :param dict curr_fields: A complete set of fields for the template
+
+        :returns: Tuple with the version key name and the list of keys to skip
+        """
+        # first, find all abstract (Sequence) keys from the template:
+        abstract_keys = set()
+        for key_name, key in template.keys.items():
+            if key.is_abstract:
+                abstract_keys.add(key_name)
+
+        # skip keys are all abstract keys + 'version' & 'eye' and 'camera_version' & 'Step' if a camera
+        if "camera_version" in curr_fields:
+            version_key = "camera_version"
+            skip_keys = [k for k in abstract_keys] + [version_key, "eye", "version", "Step"]
+        else:
+            version_key = VERSION_KEY
+            skip_keys = [k for k in abstract_keys] + [version_key, "eye"]
+
+        return version_key, skip_keys
+
+    def _get_highest_version(self, template, version_key, paths):
+        """
+        Returns the highest version number found in the given paths.
+
+        :param template: Template object matching the paths
+        :param str version_key: Name of the template key holding the version
+        :param list paths: Paths found on disk for the template
+
+        :returns: The highest version number found
+        :rtype: int
+        """
+        highest_version = 0
+        for path in paths:
+            fields = template.get_fields(path)
+            if fields[version_key] > highest_version:
+                highest_version = fields[version_key]
+        return highest_version
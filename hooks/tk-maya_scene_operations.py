@@ -10,6 +10,10 @@
 
 from sgtk import Hook
 import maya.cmds as cmds
+import maya.api.OpenMaya as om
+import contextlib
+import collections
+import time
 import os
 
 
@@ -52,22 +56,54 @@ class BreakdownSceneOperations(Hook):
             maya_path = ref.replace("/", os.path.sep)
             refs.append({"node": node_name, "type": "reference", "path": maya_path})
 
-        # now look at file texture nodes
-        for file_node in cmds.ls(l=True, type="file"):
-            # ensure this is actually part of this scene and not referenced
-            if cmds.referenceQuery(file_node, isNodeReferenced=True):
-                # this is embedded in another reference, so don't include it in the breakdown
+        # now look at file texture nodes. scenes can hold tens of thousands of
+        # them, so their reference state and paths are gathered in bulk rather
+        # than with a command per node
+        file_nodes = cmds.ls(l=True, type="file") or []
+        # nodes embedded in another reference are not included in the breakdown
+        referenced_nodes = set(
+            cmds.ls(l=True, type="file", referencedNodes=True) or []
+        )
+        file_nodes = [node for node in file_nodes if node not in referenced_nodes]
+
+        texture_paths = self._get_texture_paths(file_nodes)
+        for file_node in file_nodes:
+            path = texture_paths.get(file_node)
+            if path is None:
                 continue
-
-            # get path and make it platform dependent (maya uses C:/style/paths)
-            path = cmds.getAttr("%s.fileTextureName" % file_node).replace(
-                "/", os.path.sep
-            )
-
+            # make the path platform dependent (maya uses C:/style/paths)
+            path = path.replace("/", os.path.sep)
             refs.append({"node": file_node, "type": "file", "path": path})
 
         return refs
 
+    def _get_texture_paths(self, file_nodes):
+        """
+        Returns the texture paths of file nodes, read through the API in a single
+        pass rather than with a getAttr command per node.
+
+        :param list file_nodes: Names of the file nodes
+        :returns: Dictionary of texture paths keyed by node name. Nodes which
+                  don't exist anymore are left out.
+        """
+        # a selection list merges the nodes it already holds, so the nodes are
+        # looked up one at a time rather than relying on the list's order
+        selection = om.MSelectionList()
+        fn_node = om.MFnDependencyNode()
+        paths = {}
+        for file_node in file_nodes:
+            if file_node in paths:
+                continue
+            selection.clear()
+            try:
+                selection.add(file_node)
+            except RuntimeError:
+                # deleted or renamed since the scene was scanned
+                continue
+            fn_node.setObject(selection.getDependNode(0))
+            paths[file_node] = fn_node.findPlug("fileTextureName", False).asString()
+        return paths
+
     def update(self, items):
         """
         Perform replacements given a number of scene items passed from the app.
@@ -78,27 +114,104 @@ class BreakdownSceneOperations(Hook):
         The items parameter is a list of dictionaries on the same form as was
         generated by the scan_scene hook above. The path key now holds
         the that each node should be updated *to* rather than the current path.
+
+        All the items are updated in a single undo chunk, with the viewport
+        refresh and the evaluation manager suspended, so the scene is only
+        re-evaluated once all the nodes have been updated. References are
+        reloaded first, then the texture paths are set for the file nodes
+        which do not already point at their new path.
         """
 
         engine = self.parent.engine
 
+        references = []
+        textures = []
         for i in items:
+            if i["type"] == "reference":
+                references.append(i)
+            elif i["type"] == "file":
+                textures.append(i)
+
+        if not references and not textures:
+            return
+
+        timings = []
+        cmds.undoInfo(openChunk=True, chunkName="Scene Breakdown Update")
+        try:
+            with self._suspended_evaluation():
+
+                start = time.time()
+                for i in references:
+                    # maya reference
+                    engine.log_debug(
+                        "Maya Reference %s: Updating to version %s"
+                        % (i["node"], i["path"])
+                    )
+                    cmds.file(i["path"], loadReference=i["node"])
+                timings.append(("reference", len(references), time.time() - start))
+
+                start = time.time()
+                # file texture nodes, grouped by new path and skipping the ones
+                # which are already up to date, reading all the current paths
+                # in a single pass. a node listed more than once is only
+                # updated once, to the last path given for it
+                new_paths = collections.OrderedDict()
+                for i in textures:
+                    new_paths.pop(i["node"], None)
+                    new_paths[i["node"]] = i["path"]
+                current_paths = self._get_texture_paths(list(new_paths))
+
+                nodes_by_path = collections.OrderedDict()
+                for (node, new_path) in new_paths.items():
+                    if node not in current_paths:
+                        engine.log_warning(
+                            "File Texture %s: Node not found, skipping update" % node
+                        )
+                    elif current_paths[node] != new_path:
+                        nodes_by_path.setdefault(new_path, []).append(node)
+
+                for (new_path, nodes) in nodes_by_path.items():
+                    engine.log_debug(
+                        "File Textures %s: Updating to version %s"
+                        % (", ".join(nodes), new_path)
+                    )
+                    for node in nodes:
+                        cmds.setAttr(
+                            "%s.fileTextureName" % node, new_path, type="string"
+                        )
+                timings.append(("file", len(textures), time.time() - start))
+        finally:
+            cmds.undoInfo(closeChunk=True)
+
+        engine.log_debug(
+            "Breakdown update timings: %s"
+            % ", ".join(
+                "%d %s node(s) in %.3fs" % (count, node_type, duration)
+                for (node_type, count, duration) in timings
+                if count
+            )
+        )
 
-            node = i["node"]
-            node_type = i["type"]
-            new_path = i["path"]
-
-            if node_type == "reference":
-                # maya reference
-                engine.log_debug(
-                    "Maya Reference %s: Updating to version %s" % (node, new_path)
-                )
-                cmds.file(new_path, loadReference=node)
-
-            elif node_type == "file":
-                # file texture node
-                engine.log_debug(
-                    "File Texture %s: Updating to version %s" % (node, new_path)
-                )
-                file_name = cmds.getAttr("%s.fileTextureName" % node)
-                cmds.setAttr("%s.fileTextureName" % node, new_path, type="string")
+    @contextlib.contextmanager
+    def _suspended_evaluation(self):
+        """
+        Context manager suspending the viewport refresh and the evaluation
+        manager, which would otherwise rebuild its graph and re-evaluate the
+        scene after each node update. Both are restored on exit.
+        """
+        evaluation_mode = None
+        if not cmds.about(batch=True):
+            # the evaluation manager is only available from Maya 2016
+            if hasattr(cmds, "evaluationManager"):
+                evaluation_mode = cmds.evaluationManager(query=True, mode=True)[0]
+                if evaluation_mode != "off":
+                    cmds.evaluationManager(mode="off")
+            cmds.refresh(suspend=True)
+        try:
+            yield
+        finally:
+            if not cmds.about(batch=True):
+                cmds.refresh(suspend=False)
+                if evaluation_mode and evaluation_mode != "off":
+                    cmds.evaluationManager(mode=evaluation_mode)
+                cmds.refresh()
@@ -9,7 +9,18 @@
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
 # Import the get_breakdown_items() method so that it can be used in the app.py.
-from .breakdown import get_breakdown_items  # noqa
+from .breakdown import (  # noqa
+    get_breakdown_items,
+    iter_breakdown_items,
+    get_publish_cache,
+    update_breakdown_items,
+)
+from .report import build_report, format_report  # noqa
+from .persistent_publish_cache import get_persistent_publish_cache  # noqa
+from .directory_cache import get_directory_cache, paths_from_template  # noqa
+from .template_matcher import get_template_matcher  # noqa
+from .thumbnail_cache import get_thumbnail_cache  # noqa
+from .timing import get_span_recorder  # noqa
 
 
 def show_dialog(app):
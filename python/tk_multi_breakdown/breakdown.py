@@ -10,25 +10,48 @@
 
 import os
 import re
+import copy
 import urllib
 import shutil
 import sys
 import json
 import sgtk
 
+from .directory_cache import paths_from_template
+from .publish_cache import PublishCache, MISSING
+from .persistent_publish_cache import get_persistent_publish_cache
+from .template_matcher import get_template_matcher
+from .timing import get_span_recorder
+
 # cache the publish data we pull down from shotgun for performance
-g_cached_sg_publish_data = {}
+g_publish_cache = PublishCache()
 
 # the template key we use to find the version number
 VERSION_KEY = "version"
 
+# number of scene objects resolved per chunk when streaming the breakdown items
+STREAM_CHUNK_SIZE = 200
+
+# matches the frame part of image sequences outside of the template system
+SEQUENCE_REGEX = re.compile(r'^.+\.(?P<seq>\<.+\>|\d+|#+)\..+$')
+
+# matches the frame pattern of a normalized sequence path
+FRAME_PATTERN_REGEX = re.compile(r'(\%+\d+d)')
+
+# matches the version part of paths outside of the template system
+PATH_VERSION_REGEX = re.compile(r'[\/|\.|_]v(?P<version>\d+)')
+
 
-def get_breakdown_items():
+def get_breakdown_items(scene_objects=None):
     """
     Analyzes the scene (by running a hook) and returns a list of items
     in the scene which are applicable for the breakdown. These items all
     match some template inside toolkit and have a concept of a version field.
 
+    A list of scene objects, on the same form as returned by the scan_scene hook
+    method, can be passed in to only resolve these objects rather than scanning
+    the whole scene, for example to refresh a few nodes after updating them.
+
     The file paths detected are also checked against shotgun, and in the case
     a match is found in shotgun (in the form of a publish record), metadata for
     this shotgun object is downloaded and returned. This method will send a single
@@ -42,6 +65,7 @@ def get_breakdown_items():
      'path':         # pull path to the items
      'sg_data':      # shotgun publish data if applicable (None otherwise)
      'template':     # template object representing the path
+     'scan_id':      # correlation id of the timing spans of this analysis
      }
 
     The node type and node name are generated by the hook and are specific to the DCC. These are passed
@@ -75,114 +99,142 @@ def get_breakdown_items():
                  'version_number': 1},
      'template': <Sgtk TemplatePath nuke_shot_render_pub_mono_dpx>}
 
+    :param scene_objects: Optional list of dictionaries with node, type and path
+                          keys to resolve instead of scanning the scene.
     :returns: See details above.
     """
-    global g_cached_sg_publish_data
     items = []
+    for chunk in iter_breakdown_items(scene_objects, chunk_size=None):
+        items.extend(chunk)
+    return items
 
-    # perform the scene scanning in the main UI thread - a lot of apps are sensitive to these
-    # types of operations happening in other threads.
-    app = sgtk.platform.current_bundle()
-    scene_objects = app.engine.execute_in_main_thread(
-        app.execute_hook_method, "hook_scene_operations", "scan_scene"
-    )
-    # returns a list of dictionaries, each dict being like this:
-    # {"node": node_name, "type": "reference", "path": maya_path}
-
-    for scene_object in scene_objects:
-
-        node_name = scene_object.get("node")
-        node_type = scene_object.get("type")
-        file_name = scene_object.get("path").replace("/", os.path.sep)
-        # replace multiple slashes before jobs to just one
-        file_name = re.sub(r'^/+jobs', '/jobs', file_name)
-
-        # print "node: {}, type: {}, path: {}".format(node_name, node_type, file_name)
-
-        # see if this read node matches any path in the templates setup
-        try:
-            matching_template = app.sgtk.template_from_path(file_name)
-        except Exception as e:
-            # print e
-            matching_template = ""
-            pass
-
-        if matching_template:
-            # see if we have a version number
-            fields = matching_template.get_fields(file_name)
-            
-            # hack to fix shotgun resolving pub_task and pub_name to be the same
-            if fields.get("pub_task") is not None and fields.get("pub_name") is not None:
-                if fields.get("pub_task") == fields.get("pub_name"):
-                    # remove pub task key
-                    fields.pop("pub_task")
-
-            if VERSION_KEY in fields:
-
-                # now the fields are the raw breakdown of the path in the read node.
-                # could be bla.left.0002.exr, bla.%V.####.exr etc
-
-                # remove all abstract fields from keys so that the default value will get used
-                # when building a path from the template.  This is consistent with the utility
-                # method 'register_publish'
-                for key_name, key in matching_template.keys.items():
-                    if key_name in fields and key.is_abstract:
-                        del fields[key_name]
-
-                # we also want to normalize the eye field (this should probably be an abstract field!)
-                # note: we need to do this explicitly because the eye isn't abstract in the default
-                # configs yet (which is incorrect!).
-                fields["eye"] = "%V"
-
-                # now build the normalized path that we can use to find corresponding Shotgun published files
-                normalized_path = matching_template.apply_fields(fields)
-
-                item = {}
-                item["path"] = normalized_path
-                item["node_name"] = node_name
-                item["node_type"] = node_type
-                item["template"] = matching_template
-                item["fields"] = fields
-                item["sg_data"] = None
 
-                # store the normalized fields in dict
-                items.append(item)
-        else:
-            # if there is path, store it
-            if file_name:
-                item = {}
-                seq_pat = re.compile(r'^.+\.(?P<seq>\<.+\>|\d+|#+)\..+$')
-                seq_pat_result = seq_pat.search(file_name)
-                if seq_pat_result:
-                    # normalizing path
-                    file_name = file_name.replace(seq_pat_result.group('seq'), '%04d')
-                    # store the seq pat str
-                    item['seq_str'] = seq_pat_result.group('seq')
-
-                item["path"] = file_name
-                item["node_name"] = node_name
-                item["node_type"] = node_type
-                item["template"] = None
-                item["fields"] = None
+def iter_breakdown_items(scene_objects=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Streaming version of get_breakdown_items().
+
+    The scene is scanned once and its objects are then resolved in chunks:
+    a list of breakdown items is yielded for every chunk_size scene objects,
+    each of them with its Shotgun publish data already attached. This allows
+    callers to display the first items long before the whole scene has been
+    analyzed. Note that a chunk can be empty if none of its scene objects are
+    applicable for the breakdown.
+
+    :param scene_objects: Optional list of dictionaries with node, type and path
+                          keys to resolve instead of scanning the scene.
+    :param int chunk_size: Number of scene objects resolved per chunk. If None,
+                           all the scene objects are resolved in a single chunk.
+    :returns: Generator of lists of breakdown items, see get_breakdown_items().
+              Each item also has a scan_id key, the correlation id of the timing
+              spans recorded for this analysis.
+    """
+    app = sgtk.platform.current_bundle()
+    recorder = get_span_recorder()
+    scan_id = recorder.new_id()
+    template_matcher = get_template_matcher(app.sgtk)
+    if scene_objects is None:
+        # perform the scene scanning in the main UI thread - a lot of apps are sensitive to these
+        # types of operations happening in other threads.
+        with recorder.span("scan", scan_id):
+            scene_objects = app.engine.execute_in_main_thread(
+                app.execute_hook_method, "hook_scene_operations", "scan_scene"
+            )
+        # returns a list of dictionaries, each dict being like this:
+        # {"node": node_name, "type": "reference", "path": maya_path}
+
+    if not chunk_size:
+        chunk_size = max(len(scene_objects), 1)
+
+    # many nodes typically reference the same file, so each unique path is only
+    # resolved once and the result is then fanned out to all the nodes using it.
+    resolved_paths = {}
+    for start in range(0, len(scene_objects), chunk_size):
+        chunk = scene_objects[start : start + chunk_size]
+        items = []
+        with recorder.span("match", scan_id, items=len(chunk)):
+            for scene_object in chunk:
+
+                file_name = scene_object.get("path").replace("/", os.path.sep)
+                # replace multiple slashes before jobs to just one
+                file_name = re.sub(r'^/+jobs', '/jobs', file_name)
+
+                if file_name not in resolved_paths:
+                    resolved_paths[file_name] = _resolve_path(template_matcher, file_name)
+                resolved = resolved_paths[file_name]
+                if resolved is None:
+                    continue
+
+                item = dict(resolved)
+                if resolved["fields"] is not None:
+                    # items are handed out to callers which may modify their fields
+                    item["fields"] = dict(resolved["fields"])
+                item["node_name"] = scene_object.get("node")
+                item["node_type"] = scene_object.get("type")
                 item["sg_data"] = None
+                item["scan_id"] = scan_id
                 items.append(item)
 
+        with recorder.span("query", scan_id, items=len(items)):
+            _attach_publish_data(app, items)
+        yield items
+
+    if app.get_setting("log_timings"):
+        recorder.log_summary(app, scan_id)
+
+
+def _attach_publish_data(app, items):
+    """
+    Looks up the Shotgun publishes for the given items and stores them in
+    their sg_data key.
+
+    Publish data is cached, so only the paths which weren't looked up recently
+    are sent to Shotgun, in a single query. If the persistent publish cache is
+    enabled, publishes stored on disk by previous sessions are revalidated and
+    used before falling back to Shotgun.
+
+    :param app: The breakdown app instance
+    :param list items: Breakdown items to look up
+    """
+    publish_cache = get_publish_cache()
+    cache_namespace = _get_cache_namespace(app)
+
     # now do a second pass on all the files that are valid to see if they are published
     # note that we store (by convention) all things on a normalized sequence form in SG, e.g
     # all four-padded sequences are stored as '%04d' regardless if they have been published from
     # houdini, maya, nuke etc.
-    valid_paths = [x.get("path") for x in items]
-
-    # check if we have the path in the cache
+    # index the items by path so that publish data can be attached to all the
+    # items sharing a path in one go
+    items_by_path = {}
+    for item in items:
+        items_by_path.setdefault(item["path"], []).append(item)
+
+    # check if we have the path in the cache. Paths known to be unpublished
+    # are cached as well, so only new paths are looked up in Shotgun.
     paths_to_fetch = []
-    for p in valid_paths:
-        if p not in g_cached_sg_publish_data:
+    for (p, path_items) in items_by_path.items():
+        sg_chunk = publish_cache.get(cache_namespace, p)
+        if sg_chunk is None:
             paths_to_fetch.append(p)
+        elif sg_chunk is MISSING:
+            continue
         else:
             # use cache data!
-            for item in items:
-                if item.get("path") == p:
-                    item["sg_data"] = g_cached_sg_publish_data[p]
+            for item in path_items:
+                item["sg_data"] = sg_chunk
+
+    if not paths_to_fetch:
+        return
+
+    persistent_cache = get_persistent_publish_cache()
+    if persistent_cache:
+        stored_data = persistent_cache.load(app, cache_namespace, paths_to_fetch)
+        for (path, sg_chunk) in stored_data.items():
+            publish_cache.set(cache_namespace, path, sg_chunk)
+            for item in items_by_path[path]:
+                item["sg_data"] = sg_chunk
+        paths_to_fetch = [p for p in paths_to_fetch if p not in stored_data]
+        if not paths_to_fetch:
+            return
 
     fields = ["entity",
               "entity.Asset.sg_asset_type",  # grab asset type if it is an asset
@@ -192,7 +244,8 @@ def get_breakdown_items():
               "task",
               "task.Task.step.Step.code",
               "version_number",
-              "project"
+              "project",
+              "updated_at",
               ]
 
     if sgtk.util.get_published_file_entity_type(app.sgtk) == "PublishedFile":
@@ -201,17 +254,378 @@ def get_breakdown_items():
         fields.append("tank_type")
     sg_data = sgtk.util.find_publish(app.sgtk, paths_to_fetch, fields=fields)
     # process and cache shotgun items
+    stored_publishes = []
     for (path, sg_chunk) in sg_data.items():
+        # only used to revalidate the persistent cache entries
+        updated_at = sg_chunk.pop("updated_at", None)
+        stored_publishes.append((path, sg_chunk, updated_at))
+
         # cache item
-        g_cached_sg_publish_data[path] = sg_chunk
+        publish_cache.set(cache_namespace, path, sg_chunk)
 
         # append the sg data to the right path
-        for item in items:
-            if item.get("path") == path:
-                item["sg_data"] = sg_chunk
+        for item in items_by_path.get(path, []):
+            item["sg_data"] = sg_chunk
 
-    # we no longer need the path key in the dict, so get rid of it
-    # for item in items:
-    #     del item["path"]
-    # print "ITEMS: {}".format(json.dumps(items, indent=4, sort_keys=True))
-    return items
+    # remember the paths without any publish. these are not stored on disk,
+    # as they may be published before the next session
+    for path in paths_to_fetch:
+        if path not in sg_data:
+            publish_cache.set_missing(cache_namespace, path)
+
+    if persistent_cache and stored_publishes:
+        persistent_cache.store(app, cache_namespace, stored_publishes)
+
+
+def compute_chunk_versions(app, items):
+    """
+    Resolves the latest versions of a chunk of breakdown items in bulk.
+
+    Items sharing the same publish are only scanned once on disk and items
+    without a template are resolved with a few Shotgun queries. The UI runs
+    this for each streamed chunk in the status worker pool, so several chunks
+    are resolved concurrently.
+
+    :param app: The breakdown app instance
+    :param list items: Breakdown items with a publish
+    :returns: List of latest versions, in the same order as the items. None
+              for the items which couldn't be resolved in bulk and need to be
+              resolved individually.
+    """
+    if not items:
+        return []
+    with get_span_recorder().span(
+        "version", items[0].get("scan_id"), items=len(items)
+    ):
+        return app.compute_highest_versions(items)
+
+
+def compute_latest_version(template, fields, sg_data):
+    """
+    Returns the latest version available for a single breakdown item, by
+    running the get version number hook.
+
+    :param template: Template of the item, None for items outside the template system
+    :param dict fields: Fields of the item
+    :param dict sg_data: Shotgun publish data of the item
+    :returns: The highest version number found
+    """
+    app = sgtk.platform.current_bundle()
+    return app.execute_hook(
+        "hook_get_version_number", template=template, curr_fields=fields, sg_data=sg_data,
+    )
+
+
+def get_latest_camera_path(template, fields):
+    """
+    Get the file path of the highest camera version found on disk.
+    The template key containing the version number is assumed to be named {camera_version}.
+
+    This will perform a scan on disk to determine the highest version.
+
+    :param template: Template of the camera item
+    :param dict fields: Fields of the camera item
+    :returns: String containing the camera file path
+    """
+    # remove keys that have a variable value in the path
+    fields = {k: fields[k] for k in fields if k not in ["version", "Step", "camera_version", "eye"]}
+
+    # then find all files with these fields, going through the directory
+    # listing cache rather than globbing the publish area again
+    abstract_keys = [k for (k, key) in template.keys.items() if key.is_abstract]
+    all_versions = paths_from_template(template, fields, skip_keys=abstract_keys)
+
+    # if we didn't find anything then something has gone wrong with our
+    # logic as we should have at least one file so error out:
+    # TODO - this should be handled more cleanly!
+    if not all_versions:
+        raise sgtk.TankError("Failed to find any files!")
+
+    # now look for the highest version number...
+    highest_version = -1
+    latest_fields = None
+    for ver in all_versions:
+        ver_fields = template.get_fields(ver)
+        if ver_fields["camera_version"] > highest_version:
+            highest_version = ver_fields["camera_version"]
+            latest_fields = ver_fields
+
+    # collapse the abstract fields (frame numbers, eyes...) back to their
+    # default values, the same way abstract_paths_from_template() does
+    for key_name in abstract_keys:
+        if key_name not in fields:
+            latest_fields.pop(key_name, None)
+
+    return template.apply_fields(latest_fields)
+
+
+def get_publish_cache():
+    """
+    Returns the cache holding the publish data found for the scene paths,
+    configured with the current app settings.
+
+    :returns: :class:`PublishCache` instance
+    """
+    app = sgtk.platform.current_bundle()
+    g_publish_cache.configure(
+        max_size=app.get_setting("publish_cache_size"),
+        ttl=app.get_setting("publish_cache_ttl"),
+        miss_ttl=app.get_setting("publish_cache_miss_ttl"),
+    )
+    return g_publish_cache
+
+
+def get_update_path(app, item, latest_version):
+    """
+    Computes the path a breakdown item should be updated to.
+
+    :param app: The breakdown app instance
+    :param dict item: Breakdown item, as returned by get_breakdown_items()
+    :param latest_version: The latest version number found for the item
+    :returns: The path to update to, an empty string if it can't be determined
+    """
+    # need to manage cameras in a different way due to their unique template
+    if item["fields"] is not None and "camera_version" in item["fields"]:
+        new_path = get_latest_camera_path(item["template"], item["fields"])
+    else:
+        if latest_version is None:
+            return ""
+
+        new_path = ""
+
+        # calculate path based on latest version using templates and fields
+        if item["fields"] is not None and item["template"] is not None:
+            new_fields = copy.deepcopy(item["fields"])
+            new_fields["version"] = latest_version
+            new_path = item["template"].apply_fields(new_fields)
+        else:
+            # calculate path using the Shotgun Publish Data
+            sg_filter = [['project', 'is', item["sg_data"]['project']],
+                         ['entity', 'is', item["sg_data"]['entity']],
+                         ['task', 'is', item["sg_data"]['task']],
+                         ['published_file_type', 'is', item["sg_data"]['published_file_type']],
+                         ['name', 'is', item["sg_data"]['name']]
+                         ]
+            sg_fields = ['path', 'path_cache', 'entity', 'name', 'version_number']
+
+            pf_list = app.shotgun.find('PublishedFile', sg_filter, sg_fields)
+
+            if len(pf_list):
+                # get the latest version
+                for p in pf_list:
+                    if p.get('version_number') == latest_version:
+                        # version up current path with the latest version number
+                        version_result = PATH_VERSION_REGEX.search(item['path'])
+                        if version_result:
+                            version_up_path = item['path'].replace(version_result.group('version'), str(latest_version).zfill(3))
+                            # if the version up path matches the latest path, we're good
+                            if version_up_path == p["path"]["local_path"]:
+                                new_path = p["path"]["local_path"]
+                                break
+
+    # replace normalized path pattern with what we gathered earlier or hashes
+    if new_path and item.get("seq_str") and FRAME_PATTERN_REGEX.search(new_path):
+        new_path = FRAME_PATTERN_REGEX.sub(item["seq_str"], new_path)
+
+    return new_path
+
+
+def update_breakdown_items(app, items, latest_versions=None):
+    """
+    Updates many scene nodes to new versions with a single call to the scene
+    operations hook.
+
+    The target paths are all built and validated first, so that the hook only
+    receives valid paths. Items sharing the same template and fields only have
+    their path built once.
+
+    If latest versions are given, the items are breakdown items as returned by
+    get_breakdown_items() and their paths are computed by get_update_path(),
+    like the UI does, which also covers items outside of the template system.
+
+    :param app: The breakdown app instance
+    :param list items: List of dictionaries with node_type, node_name, template
+                       and fields keys, see the app's update_item() method.
+    :param list latest_versions: Optional versions to update the items to, in
+                                 the same order as the items.
+    :returns: List of dictionaries, in the same order as the items, with node,
+              type, path, updated and error keys. The path is None if it couldn't
+              be built, and error holds the reason an item wasn't updated.
+    """
+    recorder = get_span_recorder()
+    update_id = recorder.new_id("update")
+
+    results = []
+    updates = []
+    paths = {}
+    with recorder.span("resolve", update_id, items=len(items)):
+        for (index, item) in enumerate(items):
+            result = {
+                "node": item["node_name"],
+                "type": item["node_type"],
+                "path": None,
+                "updated": False,
+                "error": None,
+            }
+            results.append(result)
+
+            if latest_versions is not None:
+                # nodes referencing the same file share the same target path
+                latest_version = latest_versions[index]
+                path_key = (item["path"], item.get("seq_str"), latest_version)
+                if path_key not in paths:
+                    new_path = get_update_path(app, item, latest_version)
+                    paths[path_key] = (
+                        (new_path, None)
+                        if new_path
+                        else (None, "No path found for version %s" % latest_version)
+                    )
+                (result["path"], result["error"]) = paths[path_key]
+                if result["error"] is None:
+                    updates.append(result)
+                continue
+
+            template = item["template"]
+            fields = item["fields"]
+            if template is None or fields is None:
+                # nodes outside of the template system can't be updated
+                result["error"] = "No template"
+                continue
+
+            path_key = (template.name, tuple(sorted(fields.items())))
+            if path_key not in paths:
+                paths[path_key] = _build_update_path(template, fields)
+            (result["path"], result["error"]) = paths[path_key]
+
+            if result["error"] is None:
+                updates.append(result)
+
+    if updates:
+        with recorder.span("update", update_id, items=len(updates)):
+            try:
+                # call out to hook
+                app.execute_hook_method(
+                    "hook_scene_operations",
+                    "update",
+                    items=[
+                        {"node": r["node"], "type": r["type"], "path": r["path"]}
+                        for r in updates
+                    ],
+                )
+            except Exception as e:
+                app.log_exception("Failed to update the scene items")
+                for result in updates:
+                    result["error"] = "Update failed: %s" % e
+            else:
+                for result in updates:
+                    result["updated"] = True
+
+    if app.get_setting("log_timings"):
+        recorder.log_summary(app, update_id)
+    return results
+
+
+def _build_update_path(template, fields):
+    """
+    Builds and validates the path a node is updated to.
+
+    :param template: Template of the path
+    :param dict fields: Fields to apply to the template
+    :returns: Tuple with the path, None if it can't be built, and an error
+              message, None if the path is valid.
+    """
+    missing_keys = template.missing_keys(fields, skip_defaults=True)
+    if missing_keys:
+        return (None, "Missing fields: %s" % ", ".join(missing_keys))
+
+    try:
+        path = template.apply_fields(fields)
+    except sgtk.TankError as e:
+        return (None, str(e))
+
+    # paths with abstract keys, like frame numbers, don't exist as such on disk
+    has_abstract_keys = any(key.is_abstract for key in template.keys.values())
+    if not has_abstract_keys and not os.path.exists(path):
+        return (path, "Path does not exist: %s" % path)
+
+    return (path, None)
+
+
+def _get_cache_namespace(app):
+    """
+    Returns the namespace publish data is cached under for the current context.
+
+    :param app: The breakdown app instance
+    :returns: The current project id, None if there is no project in the context
+    """
+    project = app.context.project
+    return project["id"] if project else None
+
+
+def _resolve_path(template_matcher, file_name):
+    """
+    Matches a path from the scene against the templates and normalizes it.
+
+    :param template_matcher: :class:`TemplateMatcher` to match the path with
+    :param str file_name: Path of a scene object
+    :returns: Dictionary with path, template and fields keys, plus a seq_str key
+              for untemplated image sequences, or None if the path isn't
+              applicable for the breakdown.
+    """
+    # see if this read node matches any path in the templates setup
+    try:
+        matching_template = template_matcher.template_from_path(file_name)
+    except Exception:
+        matching_template = None
+
+    if matching_template:
+        # see if we have a version number
+        fields = matching_template.get_fields(file_name)
+
+        # hack to fix shotgun resolving pub_task and pub_name to be the same
+        if fields.get("pub_task") is not None and fields.get("pub_name") is not None:
+            if fields.get("pub_task") == fields.get("pub_name"):
+                # remove pub task key
+                fields.pop("pub_task")
+
+        if VERSION_KEY not in fields:
+            return None
+
+        # now the fields are the raw breakdown of the path in the read node.
+        # could be bla.left.0002.exr, bla.%V.####.exr etc
+
+        # remove all abstract fields from keys so that the default value will get used
+        # when building a path from the template.  This is consistent with the utility
+        # method 'register_publish'
+        for key_name, key in matching_template.keys.items():
+            if key_name in fields and key.is_abstract:
+                del fields[key_name]
+
+        # we also want to normalize the eye field (this should probably be an abstract field!)
+        # note: we need to do this explicitly because the eye isn't abstract in the default
+        # configs yet (which is incorrect!).
+        fields["eye"] = "%V"
+
+        # now build the normalized path that we can use to find corresponding Shotgun published files
+        return {
+            "path": matching_template.apply_fields(fields),
+            "template": matching_template,
+            "fields": fields,
+        }
+
+    # if there is path, store it
+    if not file_name:
+        return None
+
+    resolved = {}
+    seq_pat_result = SEQUENCE_REGEX.search(file_name)
+    if seq_pat_result:
+        # normalizing path
+        file_name = file_name.replace(seq_pat_result.group('seq'), '%04d')
+        # store the seq pat str
+        resolved['seq_str'] = seq_pat_result.group('seq')
+
+    resolved["path"] = file_name
+    resolved["template"] = None
+    resolved["fields"] = None
+    return resolved
@@ -15,6 +15,10 @@ from sgtk.platform.qt import QtGui
 browser_widget = sgtk.platform.import_framework("tk-framework-widget", "browser_widget")
 
 from .ui.item import Ui_Item
+from .breakdown import compute_latest_version, get_latest_camera_path
+from .thumbnail_cache import download_thumbnail, NO_THUMBNAIL
+from .thumbnail_image import get_thumbnail_image
+from .timing import get_span_recorder
 
 
 class BreakdownListItem(browser_widget.ListItem):
@@ -33,6 +37,10 @@ class BreakdownListItem(browser_widget.ListItem):
         self._latest_version = None
         self._is_latest = None
         self._browser = parent
+        self._show_red = True
+        self._show_green = True
+        self._thumbnail_url = None
+        self._thumbnail_worker_uid = None
 
     def _setup_ui(self):
         """
@@ -61,17 +69,27 @@ class BreakdownListItem(browser_widget.ListItem):
             return self._is_latest == False
 
     def calculate_status(
-        self, template, fields, show_red, show_green, entity_dict=None
+        self,
+        template,
+        fields,
+        show_red,
+        show_green,
+        entity_dict=None,
+        latest_version=None,
     ):
         """
         Figure out if this is a red or a green one. Also get thumb if possible
+
+        If the latest version has already been resolved, for example through
+        a bulk Shotgun query, it can be passed in to avoid computing it again.
         """
 
         # we can only process stuff with a version
         # if "version" not in fields:
         #     raise Exception("Fields must have a version!")
 
-        # start spinner
+        # start spinner, the status may be computed again after an update
+        self.ui.light.setPixmap(QtGui.QPixmap(":/res/empty_bullet.png"))
         self._timer.start(100)
 
         # store data
@@ -80,52 +98,31 @@ class BreakdownListItem(browser_widget.ListItem):
         self._show_red = show_red
         self._show_green = show_green
         self._sg_data = entity_dict
+        self._resolved_latest_version = latest_version
+        # forget the previous status, the item may not have a publish anymore
+        self._is_latest = None
+        self._latest_version = None
 
-        # kick off the worker!
-        self._browser._item_work_completed.connect(self._on_worker_task_complete)
-        self._browser._item_work_failed.connect(self._on_worker_failure)
-        self._worker_uid = self._worker.queue_work(self._calculate_status, {})
+        # kick off the worker! the browser routes the result back to this item
+        self._worker_uid = self._browser.queue_item_work(self, self._calculate_status)
 
     def _calculate_status(self, data):
         """
-        The computational payload that downloads thumbnails and figures out the
-        status for this item. This is run in a worker thread.
-        """
-        # set up the payload
-        output = {}
-
-        # First, calculate the thumbnail
-        # see if we can download a thumbnail
-        # thumbnail can be in any of the fields
-        # entity.Asset.image
-        # entity.Shot.image
-        # entity.Scene.image
-        # entity.Sequence.image
-        if self._sg_data:
-
-            thumb_url = self._sg_data.get("image")
-
-            if thumb_url is not None:
-                # input is a dict with a url key
-                # returns a dict with a  thumb_path key
-                ret = self._download_thumbnail({"url": thumb_url})
-                if ret:
-                    output["thumbnail"] = ret.get("thumb_path")
-                else:
-                    output["thumbnail"] = ":/res/no_thumb.png"
-            else:
-                output["thumbnail"] = ":/res/no_thumb.png"
-
-            # first, get the latest available version for this item
-            app = sgtk.platform.current_bundle()
-            latest_version = app.execute_hook(
-                "hook_get_version_number", template=self._template, curr_fields=self._fields, sg_data=self._sg_data,
+        The computational payload that figures out the status for this item.
+        This is run in a worker thread.
+        """
+        scan_id = self.data.get("scan_id")
+        with get_span_recorder().span("status", scan_id):
+            output = compute_status(
+                self._template,
+                self._fields,
+                self._sg_data,
+                self._resolved_latest_version,
+                scan_id,
             )
 
-            current_version = self._sg_data["version_number"]
-            output["up_to_date"] = latest_version == current_version
-
-            self._latest_version = latest_version
+        if output:
+            self._latest_version = output["latest_version"]
             self._is_latest = output["up_to_date"]
 
         return output
@@ -154,9 +151,14 @@ class BreakdownListItem(browser_widget.ListItem):
         self._timer.stop()
 
         if data:
-            # set thumbnail
-            if data.get("thumbnail"):
-                self.ui.thumbnail.setPixmap(QtGui.QPixmap(data.get("thumbnail")))
+            # the thumbnail is only downloaded once the item is scrolled into
+            # view, show a placeholder until then
+            thumbnail_url = (self._sg_data or {}).get("image")
+            if thumbnail_url != self._thumbnail_url:
+                self._thumbnail_url = thumbnail_url
+                self.ui.thumbnail.set_image(get_thumbnail_image(NO_THUMBNAIL))
+                if thumbnail_url:
+                    self._browser.request_thumbnail(self)
 
             # set light - red or green
             if data["up_to_date"]:
@@ -165,11 +167,58 @@ class BreakdownListItem(browser_widget.ListItem):
                 icon = self._red_pixmap
             self.ui.light.setPixmap(icon)
 
-            # figure out if this item should be hidden
-            if data["up_to_date"] == True and self._show_green == False:
-                self.setVisible(False)
-            if data["up_to_date"] == False and self._show_red == False:
-                self.setVisible(False)
+        # figure out if this item should be hidden
+        self._update_visibility()
+
+    def load_thumbnail(self):
+        """
+        Downloads the thumbnail of the item in the background. This is called by
+        the browser once the item is visible.
+        """
+        self._thumbnail_worker_uid = self._browser.queue_item_thumbnail(
+            self, self._load_thumbnail
+        )
+
+    def _load_thumbnail(self, data):
+        """
+        Downloads the thumbnail, then decodes and scales it to its display size.
+        This is run in a thumbnail worker thread.
+        """
+        with get_span_recorder().span("thumbnail", self.data.get("scan_id")):
+            path = download_thumbnail(self._thumbnail_url) or NO_THUMBNAIL
+            return {"image": get_thumbnail_image(path)}
+
+    def _on_thumbnail_complete(self, uid, data):
+        """
+        Called when the thumbnail has been downloaded.
+        """
+        if uid != self._thumbnail_worker_uid:
+            return
+        self.ui.thumbnail.set_image(data["image"])
+
+    def set_filters(self, show_red, show_green):
+        """
+        Shows or hides the item given the red/green filters, based on the
+        status already computed for it.
+
+        :param bool show_red: Whether out of date items should be shown
+        :param bool show_green: Whether up to date items should be shown
+        """
+        self._show_red = show_red
+        self._show_green = show_green
+        self._update_visibility()
+
+    def _update_visibility(self):
+        """
+        Shows or hides the item given its status and the current filters.
+        Items with a status not yet computed are always shown.
+        """
+        if self._is_latest is None:
+            self.setVisible(True)
+        elif self._is_latest:
+            self.setVisible(self._show_green)
+        else:
+            self.setVisible(self._show_red)
 
     def get_latest_camera(self):
         """
@@ -180,27 +229,37 @@ class BreakdownListItem(browser_widget.ListItem):
 
         :returns: String containing the camera file path
         """
-        app = sgtk.platform.current_bundle()
+        return get_latest_camera_path(self._template, self._fields)
 
-        # remove keys that have a variable value in the path
-        fields = {k: self._fields[k] for k in self._fields if k not in ["version", "Step", "camera_version", "eye"]}
 
-        # then find all files with these fields
-        all_versions = app.sgtk.abstract_paths_from_template(self._template, fields)
+def compute_status(template, fields, sg_data, latest_version, scan_id=None):
+    """
+    The computational payload that figures out the status for a breakdown item.
+    This is run in a worker thread.
+
+    Thumbnails are not downloaded here, they are loaded separately once the
+    item is visible so that they don't delay the version checks.
+
+    :param template: Template of the item, None for items outside the template system
+    :param dict fields: Fields of the item
+    :param dict sg_data: Shotgun publish data of the item
+    :param latest_version: The latest version if already resolved, None otherwise
+    :param str scan_id: Correlation id of the timing spans of the item's analysis
+    :returns: Dictionary with up_to_date and latest_version keys.
+              Empty if the item has no publish.
+    """
+    # set up the payload
+    output = {}
+
+    if sg_data:
 
-        # if we didn't find anything then something has gone wrong with our
-        # logic as we should have at least one file so error out:
-        # TODO - this should be handled more cleanly!
-        if not all_versions:
-            raise sgtk.TankError("Failed to find any files!")
+        # first, get the latest available version for this item
+        if latest_version is None:
+            with get_span_recorder().span("version", scan_id, items=1):
+                latest_version = compute_latest_version(template, fields, sg_data)
 
-        # now look for the highest version number...
-        highest_version = -1
-        latest_camera_file_path = ""
-        for ver in all_versions:
-            ver_fields = self._template.get_fields(ver)
-            if ver_fields["camera_version"] > highest_version:
-                highest_version = ver_fields["camera_version"]
-                latest_camera_file_path = ver
+        current_version = sg_data["version_number"]
+        output["up_to_date"] = latest_version == current_version
+        output["latest_version"] = latest_version
 
-        return latest_camera_file_path
+    return output
@@ -8,11 +8,11 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
-import copy
-import re
-
 from sgtk.platform.qt import QtGui
 from .ui.dialog import Ui_Dialog
+from .breakdown import get_update_path
+from .timing import get_span_recorder
+from .scene_list_view import SceneListView
 
 
 class AppDialog(QtGui.QWidget):
@@ -23,13 +23,23 @@ class AppDialog(QtGui.QWidget):
         self.ui = Ui_Dialog()
         self.ui.setupUi(self)
 
-        # set up the browsers
-        self.ui.browser.set_app(self._app)
-        self.ui.browser.set_label("Items in your Scene")
-        self.ui.browser.enable_multi_select(True)
+        # set up the browsers. very large scenes can be displayed in a model/view
+        # list instead, which doesn't create any widget per item
+        if self._app.get_setting("use_virtual_scene_list"):
+            self._browser = SceneListView(self)
+            self.ui.verticalLayout.insertWidget(
+                self.ui.verticalLayout.indexOf(self.ui.browser), self._browser
+            )
+            self.ui.browser.setVisible(False)
+        else:
+            self._browser = self.ui.browser
+        self._browser.set_app(self._app)
+        self._browser.set_label("Items in your Scene")
+        self._browser.enable_multi_select(True)
 
-        self.ui.chk_green.toggled.connect(self.setup_scene_list)
-        self.ui.chk_red.toggled.connect(self.setup_scene_list)
+        # filters are applied to the items already listed, without a new scan
+        self.ui.chk_green.toggled.connect(self._on_filters_changed)
+        self.ui.chk_red.toggled.connect(self._on_filters_changed)
 
         self.ui.update.clicked.connect(self.update_items)
         self.ui.select_all.clicked.connect(self.select_all_red)
@@ -42,7 +52,7 @@ class AppDialog(QtGui.QWidget):
     # our threads. Nuke does not do proper cleanup on exit.
 
     def closeEvent(self, event):
-        self.ui.browser.destroy()
+        self._browser.destroy()
         # okay to close!
         event.accept()
 
@@ -50,16 +60,16 @@ class AppDialog(QtGui.QWidget):
     # basic business logic
 
     def select_all_red(self):
-        for x in self.ui.browser.get_items():
+        for x in self._browser.get_items():
             try:  # hack - all items arent breakdown nodes
                 if x.is_out_of_date() and not x.is_selected():
-                    self.ui.browser.select(x)
+                    self._browser.select(x)
             except:
                 pass
 
     def update_items(self):
 
-        curr_selection = self.ui.browser.get_selected_items()
+        curr_selection = self._browser.get_selected_items()
 
         if len(curr_selection) == 0:
             QtGui.QMessageBox.information(
@@ -67,74 +77,65 @@ class AppDialog(QtGui.QWidget):
             )
             return
 
+        recorder = get_span_recorder()
+        update_id = recorder.new_id("update")
+
         data = []
-        for x in curr_selection:
-            if x.is_latest_version() is None or x.is_latest_version() is True:
-                # either unloaded or up to date
-                continue
-            
-            # need to manage cameras in a different way due to their unique template
-            if x.data["fields"] is not None and "camera_version" in x.data["fields"]:
-                new_path = x.get_latest_camera()
-            else:
-                latest_version = x.get_latest_version_number()
-                if latest_version is None:
+        updated_items = []
+        # nodes referencing the same file share the same target path, so only
+        # compute it once per path, frame token and version
+        new_paths = {}
+        with recorder.span("resolve", update_id, items=len(curr_selection)):
+            for x in curr_selection:
+                if x.is_latest_version() is None or x.is_latest_version() is True:
+                    # either unloaded or up to date
                     continue
 
-                new_path = ""
-
-                # calculate path based on latest version using templates and fields
-                if x.data["fields"] is not None and x.data["template"] is not None:
-                    new_fields = copy.deepcopy(x.data["fields"])
-                    new_fields["version"] = latest_version
-                    new_path = x.data["template"].apply_fields(new_fields)
-                else:
-                    # calculate path using the Shotgun Publish Data
-                    sg_filter = [['project', 'is', x.data["sg_data"]['project']],
-                                ['entity', 'is', x.data["sg_data"]['entity']],
-                                ['task', 'is', x.data["sg_data"]['task']],
-                                ['published_file_type', 'is', x.data["sg_data"]['published_file_type']],
-                                ['name', 'is', x.data["sg_data"]['name']]
-                                ]
-                    sg_fields = ['path', 'path_cache', 'entity', 'name', 'version_number']
-
-                    pf_list = self._app.shotgun.find('PublishedFile', sg_filter, sg_fields)
-
-                    if len(pf_list):
-                        # get the latest version
-                        for p in pf_list:
-                            if p.get('version_number') == latest_version:
-                                # version up current path with the latest version number
-                                version_pattern = re.compile(r'[\/|\.|_]v(?P<version>\d+)')
-                                version_result = version_pattern.search(x.data['path'])
-                                if version_result:
-                                    version_up_path = x.data['path'].replace(version_result.group('version'), str(latest_version).zfill(3))
-                                    # if the version up path matches the latest path, we're good
-                                    if version_up_path == p["path"]["local_path"]:
-                                        new_path = p["path"]["local_path"]
-                                        break
-
-            if new_path:
-                # replace normalized path pattern with what we gathered earlier or hashes
-                seq_pattern = re.compile(r'(\%+\d+d)')
-                if seq_pattern.search(new_path):
-                    if x.data.get('seq_str'):
-                        new_path = seq_pattern.sub(x.data.get('seq_str'), new_path)
-                d = {}
-                d["node"] = x.data["node_name"]
-                d["type"] = x.data["node_type"]
-                d["path"] = new_path
-                data.append(d)
+                latest_version = x.get_latest_version_number()
+                path_key = (x.data["path"], x.data.get("seq_str"), latest_version)
+                if path_key not in new_paths:
+                    new_paths[path_key] = get_update_path(
+                        self._app, x.data, latest_version
+                    )
+                new_path = new_paths[path_key]
+
+                if new_path:
+                    d = {}
+                    d["node"] = x.data["node_name"]
+                    d["type"] = x.data["node_type"]
+                    d["path"] = new_path
+                    data.append(d)
+                    updated_items.append((x, d, latest_version))
 
         # call out to hook
-        self._app.execute_hook_method("hook_scene_operations", "update", items=data)
+        with recorder.span("update", update_id, items=len(data)):
+            self._app.execute_hook_method("hook_scene_operations", "update", items=data)
 
-        # finally refresh the UI
-        self.setup_scene_list()
+        # finally refresh the UI, only the updated items need to be resolved
+        # again. this happens in the background, the timings of the update are
+        # logged once it is done
+        filters = self._get_filters()
+        self._browser.refresh_items(
+            updated_items, filters["show_red"], filters["show_green"], update_id
+        )
 
     def setup_scene_list(self):
-        self.ui.browser.clear()
-
+        self._browser.clear()
+        self._browser.load(self._get_filters())
+
+    def _on_filters_changed(self):
+        """
+        Shows or hides the listed items when a red/green filter is toggled.
+        """
+        filters = self._get_filters()
+        self._browser.set_filters(filters["show_red"], filters["show_green"])
+
+    def _get_filters(self):
+        """
+        Returns the red/green filters currently set in the UI.
+
+        :returns: Dictionary with show_red and show_green boolean keys
+        """
         d = {}
 
         # now analyze the filters
@@ -153,4 +154,4 @@ class AppDialog(QtGui.QWidget):
             d["show_red"] = True
             d["show_green"] = True
 
-        self.ui.browser.load(d)
+        return d
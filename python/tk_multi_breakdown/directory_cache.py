@@ -0,0 +1,239 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import re
+import fnmatch
+import threading
+
+# characters turning a path component into a glob pattern
+GLOB_MAGIC = re.compile(r"[*?[]")
+
+
+class DirectoryListingCache(object):
+    """
+    Cache of directory listings, used when scanning the publish area for versions.
+
+    Each directory is listed once and the listing is kept for as long as the
+    modification time of the directory is unchanged, so repeated version scans
+    only cost a stat per directory rather than a full listing.
+    """
+
+    def __init__(self):
+        """
+        Construction
+        """
+        self._listings = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def listdir(self, path):
+        """
+        Returns the names of the entries in the given directory.
+
+        :param str path: Path to the directory to list
+        :returns: List of entry names, empty if the directory doesn't exist
+        """
+        return self._get_listing(path)[0]
+
+    def _get_listing(self, path):
+        """
+        Returns the cached listing for a directory, listing it again if it
+        was modified since it was cached.
+
+        :param str path: Path to the directory to list
+        :returns: Tuple with the list of entry names and the set of sub directory
+                  names. The set is None when it couldn't be determined while
+                  listing the directory.
+        """
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return ([], set())
+
+        with self._lock:
+            listing = self._listings.get(path)
+            if listing is not None and listing[0] == mtime:
+                self._hits += 1
+                return listing[1:]
+            self._misses += 1
+
+        try:
+            if hasattr(os, "scandir"):
+                # scandir gives us the entry types without an extra stat per entry
+                names = []
+                dir_names = set()
+                for entry in os.scandir(path):
+                    names.append(entry.name)
+                    if entry.is_dir():
+                        dir_names.add(entry.name)
+            else:
+                names = os.listdir(path)
+                dir_names = None
+        except OSError:
+            return ([], set())
+
+        with self._lock:
+            self._listings[path] = (mtime, names, dir_names)
+        return (names, dir_names)
+
+    def glob(self, pattern):
+        """
+        Returns the paths matching a glob pattern, using cached directory listings.
+
+        This follows the same rules as glob.glob(): wildcards don't cross path
+        separators and hidden entries are only matched by patterns starting
+        with a dot.
+
+        :param str pattern: Absolute path, optionally containing wildcards
+        :returns: List of matching paths
+        """
+        (drive, pattern) = os.path.splitdrive(os.path.normpath(pattern))
+        components = pattern.split(os.path.sep)
+
+        # avoid listing the static part of the path, only check it exists
+        static_components = []
+        while components and not GLOB_MAGIC.search(components[0]):
+            static_components.append(components.pop(0))
+        if static_components == [""]:
+            # the first component of the pattern is a wildcard under the root
+            base_path = drive + os.path.sep
+        else:
+            base_path = drive + os.path.sep.join(static_components)
+
+        if not components:
+            return [base_path] if os.path.lexists(base_path) else []
+        if not os.path.isdir(base_path):
+            return []
+
+        paths = [base_path]
+        for (index, component) in enumerate(components):
+            is_leaf = index == len(components) - 1
+            is_magic = GLOB_MAGIC.search(component) is not None
+            matches = []
+            for path in paths:
+                (names, dir_names) = self._get_listing(path)
+                if is_magic:
+                    if not component.startswith("."):
+                        names = [name for name in names if not name.startswith(".")]
+                    names = fnmatch.filter(names, component)
+                elif component in names:
+                    names = [component]
+                elif os.path.lexists(os.path.join(path, component)):
+                    # the entry is named differently on a case insensitive
+                    # file system. glob checks static components with
+                    # lexists() rather than a listing, and so do we
+                    names = [component]
+                    dir_names = None
+                else:
+                    names = []
+
+                for name in names:
+                    child_path = os.path.join(path, name)
+                    if is_leaf:
+                        matches.append(child_path)
+                    elif dir_names is None:
+                        if os.path.isdir(child_path):
+                            matches.append(child_path)
+                    elif name in dir_names:
+                        matches.append(child_path)
+            paths = matches
+
+        return paths
+
+    def clear(self):
+        """
+        Discards all the cached listings.
+        """
+        with self._lock:
+            self._listings = {}
+
+    def stats(self):
+        """
+        Returns the cache statistics.
+
+        :returns: Dictionary with hits, misses and size keys
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "size": len(self._listings),
+            }
+
+
+# directory listings are shared by all the version scans of the session
+g_directory_cache = DirectoryListingCache()
+
+
+def get_directory_cache():
+    """
+    Returns the directory listing cache shared by the breakdown.
+
+    :returns: :class:`DirectoryListingCache` instance
+    """
+    return g_directory_cache
+
+
+def paths_from_template(template, fields, skip_keys=None):
+    """
+    Finds all the paths on disk matching a template, using cached directory listings.
+
+    This mirrors Sgtk.paths_from_template() and returns the same paths, but the
+    glob is run against the shared :class:`DirectoryListingCache`.
+
+    :param template: Template object to search for
+    :param dict fields: Fields to apply to the template
+    :param list skip_keys: Keys to wildcard, whatever their value in the fields
+    :returns: List of matching paths
+    """
+    skip_keys = list(skip_keys or [])
+
+    # construct local fields dictionary that doesn't include any skip keys
+    local_fields = dict(
+        (field, fields[field]) for field in fields if field not in skip_keys
+    )
+
+    # required keys without a value are wildcarded as well
+    for key in template.missing_keys(local_fields):
+        if key not in skip_keys:
+            skip_keys.append(key)
+        local_fields[key] = "*"
+
+    # build a glob for each set of keys of the template (optional keys)
+    found_paths = set()
+    globs_searched = set()
+    for keys in template._keys:
+        current_local_fields = local_fields.copy()
+        current_skip_keys = []
+        for key in skip_keys:
+            if key in keys:
+                current_skip_keys.append(key)
+                current_local_fields[key] = "*"
+
+        # a key set with missing optional keys can't form a valid path
+        if template._missing_keys(current_local_fields, keys, False):
+            continue
+
+        glob_str = template._apply_fields(
+            current_local_fields, ignore_types=current_skip_keys
+        )
+        if glob_str in globs_searched:
+            continue
+        globs_searched.add(glob_str)
+
+        found_paths.update(
+            path
+            for path in g_directory_cache.glob(glob_str)
+            if template.validate(path)
+        )
+
+    return list(found_paths)
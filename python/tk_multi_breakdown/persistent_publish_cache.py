@@ -0,0 +1,254 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import json
+import time
+import sqlite3
+import threading
+import contextlib
+
+import sgtk
+
+# number of seconds after which a stored publish is looked up again in Shotgun
+# rather than revalidated, to pick up new publishes registered for its path
+MAX_AGE = 7 * 24 * 3600
+
+# maximum number of values bound in a single SQL query
+SQL_CHUNK_SIZE = 500
+
+# maximum number of ids in a single Shotgun filter
+SG_FILTER_CHUNK_SIZE = 200
+
+
+class PersistentPublishCache(object):
+    """
+    SQLite database of the Shotgun publish data found for the scene paths, kept
+    on disk between sessions.
+
+    Entries are keyed by namespace, typically the project id, and normalized
+    path. Before being used, stored entries are revalidated with a single light
+    Shotgun query per publish entity type, comparing the id and updated_at of
+    the stored publishes. Publishes which were updated or retired since are
+    discarded and looked up again. The thumbnail urls, which Shotgun signs for a
+    limited time, are refreshed by the same query.
+
+    Database errors are logged and never fail the breakdown, the paths are
+    then simply looked up in Shotgun.
+    """
+
+    def __init__(self, db_path):
+        """
+        Construction
+
+        :param str db_path: Path of the SQLite database
+        """
+        self._db_path = db_path
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._hits = 0
+        self._stale = 0
+        self._misses = 0
+
+    @property
+    def db_path(self):
+        """
+        Path of the SQLite database.
+        """
+        return self._db_path
+
+    def load(self, app, namespace, paths):
+        """
+        Returns the stored publish data of paths, revalidated against Shotgun.
+
+        :param app: The breakdown app instance
+        :param namespace: Namespace of the entries, typically the project id
+        :param paths: Normalized paths to look up
+        :returns: Dictionary of publish data keyed by path, for the paths with a
+                  valid stored publish
+        """
+        try:
+            rows = self._select(namespace, paths)
+        except (sqlite3.Error, OSError) as e:
+            app.log_debug("Could not read the publish cache %s: %s" % (self._db_path, e))
+            return {}
+
+        # group the stored publishes per entity type, to revalidate them with
+        # one query per type
+        entries_by_type = {}
+        for (path, data, updated_at) in rows:
+            sg_data = json.loads(data)
+            entries_by_type.setdefault(sg_data["type"], {}).setdefault(
+                sg_data["id"], []
+            ).append((path, sg_data, updated_at))
+
+        found = {}
+        stale_paths = []
+        for (entity_type, entries) in entries_by_type.items():
+            ids = list(entries.keys())
+            current = {}
+            for start in range(0, len(ids), SG_FILTER_CHUNK_SIZE):
+                for record in app.shotgun.find(
+                    entity_type,
+                    [["id", "in", ids[start : start + SG_FILTER_CHUNK_SIZE]]],
+                    ["updated_at", "image"],
+                ):
+                    current[record["id"]] = record
+
+            for (publish_id, publish_entries) in entries.items():
+                record = current.get(publish_id)
+                for (path, sg_data, updated_at) in publish_entries:
+                    if record is None or str(record["updated_at"]) != updated_at:
+                        stale_paths.append(path)
+                        continue
+                    sg_data["image"] = record.get("image")
+                    found[path] = sg_data
+
+        if stale_paths:
+            try:
+                self._delete(namespace, stale_paths)
+            except (sqlite3.Error, OSError) as e:
+                app.log_debug(
+                    "Could not update the publish cache %s: %s" % (self._db_path, e)
+                )
+
+        with self._lock:
+            self._hits += len(found)
+            self._stale += len(stale_paths)
+            self._misses += len(paths) - len(found)
+        return found
+
+    def store(self, app, namespace, publishes):
+        """
+        Stores the publish data found for paths.
+
+        :param app: The breakdown app instance
+        :param namespace: Namespace of the entries, typically the project id
+        :param publishes: List of (path, publish data, updated_at) tuples
+        """
+        now = time.time()
+        rows = [
+            (str(namespace), path, json.dumps(sg_data, default=str), str(updated_at), now)
+            for (path, sg_data, updated_at) in publishes
+        ]
+        try:
+            with self._connect() as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO publishes "
+                    "(namespace, path, data, updated_at, stored_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+        except (sqlite3.Error, OSError) as e:
+            app.log_debug(
+                "Could not update the publish cache %s: %s" % (self._db_path, e)
+            )
+
+    def stats(self):
+        """
+        Returns the cache statistics.
+
+        :returns: Dictionary with hits, stale and misses keys
+        """
+        with self._lock:
+            return {"hits": self._hits, "stale": self._stale, "misses": self._misses}
+
+    def _select(self, namespace, paths):
+        """
+        Reads the entries of paths which are recent enough to be revalidated.
+
+        :returns: List of (path, data, updated_at) tuples
+        """
+        paths = list(paths)
+        rows = []
+        with self._connect() as connection:
+            for start in range(0, len(paths), SQL_CHUNK_SIZE):
+                chunk = paths[start : start + SQL_CHUNK_SIZE]
+                rows.extend(
+                    connection.execute(
+                        "SELECT path, data, updated_at FROM publishes "
+                        "WHERE namespace = ? AND stored_at > ? AND path IN (%s)"
+                        % ", ".join("?" * len(chunk)),
+                        [str(namespace), time.time() - MAX_AGE] + chunk,
+                    ).fetchall()
+                )
+        return rows
+
+    def _delete(self, namespace, paths):
+        """
+        Removes the entries of paths.
+        """
+        with self._connect() as connection:
+            connection.executemany(
+                "DELETE FROM publishes WHERE namespace = ? AND path = ?",
+                [(str(namespace), path) for path in paths],
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """
+        Context manager opening a connection to the database, creating it if
+        needed. The changes are committed and the connection closed on exit.
+
+        A connection is opened per operation, so the cache can be used from any
+        thread, and several sessions can share the database.
+        """
+        with self._lock:
+            initialized = self._initialized
+        if not initialized:
+            folder = os.path.dirname(self._db_path)
+            if not os.path.isdir(folder):
+                try:
+                    os.makedirs(folder)
+                except OSError:
+                    # created concurrently
+                    if not os.path.isdir(folder):
+                        raise
+
+        connection = sqlite3.connect(self._db_path, timeout=10)
+        try:
+            with connection:
+                if not initialized:
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS publishes ("
+                        "namespace TEXT NOT NULL, "
+                        "path TEXT NOT NULL, "
+                        "data TEXT NOT NULL, "
+                        "updated_at TEXT NOT NULL, "
+                        "stored_at REAL NOT NULL, "
+                        "PRIMARY KEY (namespace, path))"
+                    )
+                    with self._lock:
+                        self._initialized = True
+                yield connection
+        finally:
+            connection.close()
+
+
+# the persistent cache for the current app settings, None until first used
+g_persistent_publish_cache = None
+
+
+def get_persistent_publish_cache():
+    """
+    Returns the persistent publish cache, if enabled in the app settings.
+
+    :returns: :class:`PersistentPublishCache` instance, or None if the
+              persistent_publish_cache setting is off
+    """
+    global g_persistent_publish_cache
+    app = sgtk.platform.current_bundle()
+    if not app.get_setting("persistent_publish_cache"):
+        return None
+
+    db_path = os.path.join(app.cache_location, "publish_cache.sqlite")
+    if g_persistent_publish_cache is None or g_persistent_publish_cache.db_path != db_path:
+        g_persistent_publish_cache = PersistentPublishCache(db_path)
+    return g_persistent_publish_cache
@@ -0,0 +1,165 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import time
+import threading
+import collections
+
+# marker stored for the paths which have no publish in Shotgun
+MISSING = object()
+
+
+class PublishCache(object):
+    """
+    Bounded cache of the Shotgun publish data found for the paths in the scene.
+
+    Entries are namespaced, typically by project id, so that records from
+    different projects never collide. The cache holds at most max_size entries,
+    evicting the least recently used ones first, and entries expire ttl seconds
+    after they were stored.
+
+    Paths known to have no publish can be cached as well, with their own and
+    typically shorter miss_ttl, so that they aren't looked up again in Shotgun
+    every time the scene is analyzed. For those paths, get() returns
+    :data:`MISSING`.
+    """
+
+    def __init__(self, max_size=10000, ttl=600, miss_ttl=60):
+        """
+        Construction
+
+        :param int max_size: Maximum number of entries held by the cache
+        :param int ttl: Number of seconds after which an entry expires
+        :param int miss_ttl: Number of seconds after which a missing publish
+                             entry expires
+        """
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._ttl = ttl
+        self._miss_ttl = miss_ttl
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def configure(self, max_size, ttl, miss_ttl):
+        """
+        Updates the cache limits, evicting entries if the cache is now too big.
+
+        :param int max_size: Maximum number of entries held by the cache
+        :param int ttl: Number of seconds after which an entry expires
+        :param int miss_ttl: Number of seconds after which a missing publish
+                             entry expires
+        """
+        with self._lock:
+            self._max_size = max_size
+            self._ttl = ttl
+            self._miss_ttl = miss_ttl
+            self._evict()
+
+    def get(self, namespace, path, default=None):
+        """
+        Returns the publish data cached for a path.
+
+        :param namespace: Namespace of the entry, typically the project id
+        :param str path: Normalized path to look up
+        :param default: Value returned if the path isn't cached
+        :returns: The cached publish data, :data:`MISSING` if the path is known
+                  to have no publish, or the default value
+        """
+        key = (namespace, path)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self._misses += 1
+                return default
+
+            (expiry, sg_data) = entry
+            if expiry < time.time():
+                self._expirations += 1
+                self._misses += 1
+                return default
+
+            # re-insert the entry so it is the most recently used one
+            self._entries[key] = entry
+            if sg_data is MISSING:
+                self._negative_hits += 1
+            else:
+                self._hits += 1
+            return sg_data
+
+    def set(self, namespace, path, sg_data):
+        """
+        Stores the publish data found for a path.
+
+        :param namespace: Namespace of the entry, typically the project id
+        :param str path: Normalized path the data was found for
+        :param dict sg_data: Shotgun publish data
+        """
+        key = (namespace, path)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time() + self._ttl, sg_data)
+            self._evict()
+
+    def set_missing(self, namespace, path):
+        """
+        Records that no publish was found for a path.
+
+        :param namespace: Namespace of the entry, typically the project id
+        :param str path: Normalized path no publish was found for
+        """
+        key = (namespace, path)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time() + self._miss_ttl, MISSING)
+            self._evict()
+
+    def invalidate(self, namespace=None):
+        """
+        Discards cached entries.
+
+        :param namespace: Only discard the entries of this namespace. All the
+                          entries are discarded if None.
+        """
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == namespace]:
+                del self._entries[key]
+
+    def stats(self):
+        """
+        Returns the cache statistics.
+
+        :returns: Dictionary with hits, negative_hits, misses, evictions,
+                  expirations and size keys
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "negative_hits": self._negative_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "size": len(self._entries),
+            }
+
+    def _evict(self):
+        """
+        Evicts the least recently used entries until the cache fits its size.
+        Must be called with the lock held.
+        """
+        while len(self._entries) > max(self._max_size, 0):
+            self._entries.popitem(last=False)
+            self._evictions += 1
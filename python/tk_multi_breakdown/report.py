@@ -0,0 +1,148 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import json
+
+import sgtk
+
+from .breakdown import (
+    get_breakdown_items,
+    compute_latest_version,
+    update_breakdown_items,
+)
+
+
+def build_report(app, update=False):
+    """
+    Analyzes the scene and reports which items are out of date, optionally
+    updating them. This doesn't use Qt, so it can run in batch sessions.
+
+    The latest versions are resolved in bulk for the whole scene and all the
+    updates are applied by update_breakdown_items(), with a single call to the
+    scene operations hook.
+
+    The report looks like this:
+
+    {'items': [{'node': 'Read2',
+                'type': 'Read',
+                'path': '/mnt/projects/.../aaa_00010_test_output_v001.%04d.dpx',
+                'version': 1,
+                'latest_version': 3,
+                'up_to_date': False,
+                'error': None,
+                'updated_path': '/mnt/projects/.../aaa_00010_test_output_v003.%04d.dpx'},
+               ...],
+     'summary': {'total': 12,
+                 'up_to_date': 9,
+                 'out_of_date': 2,
+                 'unpublished': 1,
+                 'unresolved': 0,
+                 'updated': 2}}
+
+    Items without a publish in Shotgun have None for their version,
+    latest_version and up_to_date keys. Items whose latest version couldn't be
+    resolved, for example because their files are missing on disk, have None
+    for their latest_version and up_to_date keys and the reason in their error
+    key. The updated_path key is only set for the items which were updated,
+    the error key holds the reason why out of date items couldn't be updated.
+
+    :param app: The breakdown app instance
+    :param bool update: Whether the out of date items should be updated to
+                        their latest version
+    :returns: Dictionary with items and summary keys, see above
+    """
+    items = get_breakdown_items()
+
+    # resolve the latest versions for the whole scene at once, items which
+    # couldn't be resolved in bulk are retried per item like in the UI
+    published_items = [item for item in items if item.get("sg_data")]
+    latest_versions = app.compute_highest_versions(published_items)
+    latest_by_item = {}
+    errors_by_item = {}
+    for (item, latest_version) in zip(published_items, latest_versions):
+        if latest_version is None:
+            try:
+                latest_version = compute_latest_version(
+                    item["template"], item["fields"], item["sg_data"]
+                )
+            except sgtk.TankError as e:
+                errors_by_item[id(item)] = str(e)
+        latest_by_item[id(item)] = latest_version
+
+    report_items = []
+    summary = {
+        "total": len(items),
+        "up_to_date": 0,
+        "out_of_date": 0,
+        "unpublished": 0,
+        "unresolved": 0,
+        "updated": 0,
+    }
+    # out of date items to update, with their report item and latest version
+    updates = []
+
+    for item in items:
+        report_item = {
+            "node": item["node_name"],
+            "type": item["node_type"],
+            "path": item["path"],
+            "version": None,
+            "latest_version": None,
+            "up_to_date": None,
+            "error": None,
+        }
+        report_items.append(report_item)
+
+        if not item.get("sg_data"):
+            summary["unpublished"] += 1
+            continue
+
+        report_item["version"] = item["sg_data"]["version_number"]
+        if id(item) in errors_by_item:
+            report_item["error"] = errors_by_item[id(item)]
+            summary["unresolved"] += 1
+            continue
+
+        latest_version = latest_by_item[id(item)]
+        report_item["latest_version"] = latest_version
+        report_item["up_to_date"] = latest_version == report_item["version"]
+
+        if report_item["up_to_date"]:
+            summary["up_to_date"] += 1
+            continue
+        summary["out_of_date"] += 1
+
+        if update:
+            updates.append((item, report_item, latest_version))
+
+    if updates:
+        results = update_breakdown_items(
+            app,
+            [item for (item, _, _) in updates],
+            [latest_version for (_, _, latest_version) in updates],
+        )
+        for ((_, report_item, _), result) in zip(updates, results):
+            if result["updated"]:
+                report_item["updated_path"] = result["path"]
+                summary["updated"] += 1
+            else:
+                report_item["error"] = result["error"]
+
+    return {"items": report_items, "summary": summary}
+
+
+def format_report(report):
+    """
+    Serializes a report as compact JSON.
+
+    :param dict report: Report, as returned by build_report()
+    :returns: JSON string
+    """
+    return json.dumps(report, separators=(",", ":"), sort_keys=True)
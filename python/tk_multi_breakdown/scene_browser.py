@@ -10,7 +10,7 @@
 
 
 import sgtk
-from sgtk.platform.qt import QtCore
+from sgtk.platform.qt import QtCore, QtGui
 from . import breakdown
 
 
@@ -20,6 +20,9 @@ shotgun_globals = sgtk.platform.import_framework(
 )
 
 from .breakdown_list_item import BreakdownListItem
+from .status_pool import StatusWorkerPool
+from .timing import get_span_recorder
+from .thumbnail_cache import THUMBNAIL_WORKER_COUNT
 
 
 class SceneBrowserWidget(browser_widget.BrowserWidget):
@@ -29,20 +32,94 @@ class SceneBrowserWidget(browser_widget.BrowserWidget):
 
     def __init__(self, parent=None):
         browser_widget.BrowserWidget.__init__(self, parent)
+        self._reset_stream()
+        # current red/green filters, applied to the items as they are streamed in
+        self._show_red = True
+        self._show_green = True
+
+        # thumbnails are only loaded for the items scrolled into view. the
+        # visible items are looked for once scrolling or resizing settles
+        self._visibility_timer = QtCore.QTimer(self)
+        self._visibility_timer.setSingleShot(True)
+        self._visibility_timer.setInterval(50)
+        self._visibility_timer.timeout.connect(self._load_visible_thumbnails)
+        for scroll_area in self.findChildren(QtGui.QScrollArea):
+            scroll_area.verticalScrollBar().valueChanged.connect(
+                self._visibility_timer.start
+            )
+
+    def clear(self):
+        browser_widget.BrowserWidget.clear(self)
+        # any chunks still being streamed and any pending status
+        # computations or thumbnail downloads belong to the previous load
+        for pool in self._get_pools():
+            pool.clear()
+        self._reset_stream()
+
+    def destroy(self):
+        for pool in self._get_pools():
+            pool.stop()
+        self._status_pool = None
+        self._thumbnail_pool = None
+        browser_widget.BrowserWidget.destroy(self)
+
+    def _get_pools(self):
+        """
+        Returns the worker pools created so far. The base class may clear the
+        browser before the pools are created by set_app().
+        """
+        pools = [
+            getattr(self, "_status_pool", None),
+            getattr(self, "_thumbnail_pool", None),
+        ]
+        return [pool for pool in pools if pool]
+
+    def resizeEvent(self, event):
+        browser_widget.BrowserWidget.resizeEvent(self, event)
+        self._visibility_timer.start()
+
+    def load(self, data):
+        """
+        Analyzes the scene and lists its items.
+
+        :param dict data: Dictionary with the show_red and show_green filters
+        """
+        browser_widget.BrowserWidget.load(self, data)
+        self._show_red = data["show_red"]
+        self._show_green = data["show_green"]
 
     def get_data(self, data):
-        items = breakdown.get_breakdown_items()
-        return {
-            "items": items,
-            "show_red": data["show_red"],
-            "show_green": data["show_green"],
-        }
-
-    def _make_row(self, first, second):
-        return "<tr><td><b>%s</b>&nbsp;&nbsp;&nbsp;</td><td>%s</td></tr>" % (
-            first,
-            second,
-        )
+        # the scene is analyzed in chunks, the first one is returned here
+        # and the following ones are requested as the rows are added
+        data = dict(data)
+        data["chunks"] = breakdown.iter_breakdown_items()
+        return self._get_next_chunk(data)
+
+    def _get_next_chunk(self, data):
+        """
+        Resolves the next chunk of breakdown items. This is run in the worker thread.
+        """
+        return get_next_chunk(self._app, data)
+
+    def _reset_stream(self):
+        """
+        Forgets about the chunks, groups and pending item work of the current load.
+        """
+        self._chunk_work_uid = None
+        # worker uid -> list item the work was queued for
+        self._items_by_uid = {}
+        self._thumbnails_by_uid = {}
+        # worker uid -> list of (list item, breakdown item) tuples of a chunk
+        # whose versions are being resolved
+        self._versions_by_uid = {}
+        # worker uid -> (updated items, update correlation id) of a refresh
+        self._refreshes_by_uid = {}
+        # items with a thumbnail to load once they are visible
+        self._pending_thumbnails = []
+        self._item_count = 0
+        # group name -> [header widget, last widget of the group]
+        self._groups = {}
+        self._last_widget = None
 
     def set_app(self, app):
         browser_widget.BrowserWidget.set_app(self, app)
@@ -55,149 +132,516 @@ class SceneBrowserWidget(browser_widget.BrowserWidget):
             lambda uid, msg: self._item_work_failed.emit(uid, msg)
         )
 
-    def process_result(self, result):
+        # item statuses are computed concurrently by a pool of workers,
+        # thumbnails are downloaded by a separate pool at a lower priority
+        self._status_pool = StatusWorkerPool(
+            app.get_setting("status_worker_count"), parent=self
+        )
+        self._thumbnail_pool = StatusWorkerPool(
+            THUMBNAIL_WORKER_COUNT, parent=self, priority=QtCore.QThread.LowPriority
+        )
+        for pool in (self._status_pool, self._thumbnail_pool):
+            pool.work_completed.connect(
+                lambda uid, data: self._item_work_completed.emit(uid, data)
+            )
+            pool.work_failure.connect(
+                lambda uid, msg: self._item_work_failed.emit(uid, msg)
+            )
+
+        self._item_work_completed.connect(self._on_work_completed)
+        self._item_work_failed.connect(self._on_work_failed)
+
+    def queue_item_work(self, item, worker_fn):
+        """
+        Queues work for a list item in the status worker pool.
+
+        The result is routed to this item only, through its
+        _on_worker_task_complete() or _on_worker_failure() method.
+
+        :param item: The list item the work is done for
+        :param worker_fn: Method to run in a worker thread
+        :returns: The uid of the work queued
+        """
+        uid = self._status_pool.queue_work(worker_fn, {})
+        self._items_by_uid[uid] = item
+        return uid
+
+    def request_thumbnail(self, item):
+        """
+        Requests the thumbnail of an item to be loaded once the item is visible.
+
+        :param item: The list item to load the thumbnail of
+        """
+        self._pending_thumbnails.append(item)
+        self._visibility_timer.start()
+
+    def queue_item_thumbnail(self, item, worker_fn):
+        """
+        Queues a thumbnail download for a list item in the thumbnail worker pool.
+
+        The result is routed to this item only, through its
+        _on_thumbnail_complete() method.
+
+        :param item: The list item the thumbnail is loaded for
+        :param worker_fn: Method to run in a worker thread
+        :returns: The uid of the work queued
+        """
+        uid = self._thumbnail_pool.queue_work(worker_fn, {})
+        self._thumbnails_by_uid[uid] = item
+        return uid
+
+    def _load_visible_thumbnails(self):
+        """
+        Loads the thumbnails of the pending items which are currently visible.
+        Items scrolled out of view or hidden by the filters are kept pending.
+        """
+        pending_thumbnails = []
+        for item in self._pending_thumbnails:
+            if item.isVisible() and not item.visibleRegion().isEmpty():
+                item.load_thumbnail()
+            else:
+                pending_thumbnails.append(item)
+        self._pending_thumbnails = pending_thumbnails
+
+    def _on_work_completed(self, uid, data):
+        """
+        Dispatches the results of the worker to the chunk stream or to the item
+        the work was queued for.
+        """
+        if uid == self._chunk_work_uid:
+            # chunk of items following the first one
+            self.process_result(data)
+            return
 
-        if len(result.get("items")) == 0:
-            self.set_message("No versioned data in your scene!")
+        item = self._items_by_uid.pop(uid, None)
+        if item is not None:
+            item._on_worker_task_complete(uid, data)
             return
 
-        ################################################################################
-        # PASS 1 - grouping
-        # group these items into various buckets first based on type, and asset type
-        groups = {}
+        versioned_items = self._versions_by_uid.pop(uid, None)
+        if versioned_items is not None:
+            # items which couldn't be resolved in bulk are resolved per item
+            for ((i, d), latest_version) in zip(versioned_items, data):
+                self._calculate_status(i, d, latest_version)
+            return
 
-        for d in result["items"]:
+        refresh = self._refreshes_by_uid.pop(uid, None)
+        if refresh is not None:
+            self._on_items_refreshed(refresh[0], refresh[1], data)
+            return
 
-            if d.get("sg_data"):
+        item = self._thumbnails_by_uid.pop(uid, None)
+        if item is not None:
+            item._on_thumbnail_complete(uid, data)
+
+    def _on_work_failed(self, uid, msg):
+        """
+        Dispatches the failures of the worker to the chunk stream or to the item
+        the work was queued for.
+        """
+        if uid == self._chunk_work_uid:
+            self._chunk_work_uid = None
+            self._app.log_warning("Failed to analyze the scene: %s" % msg)
+            return
+
+        item = self._items_by_uid.pop(uid, None)
+        if item is not None:
+            item._on_worker_failure(uid, msg)
+            return
+
+        versioned_items = self._versions_by_uid.pop(uid, None)
+        if versioned_items is not None:
+            # fall back to resolving the versions per item
+            self._app.log_debug("Failed to resolve versions in bulk: %s" % msg)
+            for (i, d) in versioned_items:
+                self._calculate_status(i, d, None)
+            return
+
+        if self._refreshes_by_uid.pop(uid, None) is not None:
+            # the whole list is resolved again instead
+            self._app.log_warning("Failed to refresh the updated items: %s" % msg)
+            self.clear()
+            self.load({"show_red": self._show_red, "show_green": self._show_green})
+            return
 
-                # publish in shotgun!
-                sg_data = d["sg_data"]
+        if self._thumbnails_by_uid.pop(uid, None) is not None:
+            self._app.log_debug("Failed to load thumbnail: %s" % msg)
 
-                entity = sg_data.get("entity")
-                if entity is None:
-                    entity_type = "Unknown Type"
-                else:
-                    entity_type = entity["type"]
+    def process_result(self, result):
+        """
+        Adds a chunk of resolved items to the list and requests the next one.
+        """
+        if result["items"] is None:
+            # all the chunks have been processed
+            self._chunk_work_uid = None
+            if self._item_count == 0:
+                self.set_message("No versioned data in your scene!")
+            return
 
-                asset_type = sg_data["entity.Asset.sg_asset_type"]
+        # request the next chunk straight away, so it is resolved while
+        # the rows of this one are being created
+        self._chunk_work_uid = self._worker.queue_work(
+            self._get_next_chunk, result, asap=True
+        )
+
+        versioned_items = []
+        for d in result["items"]:
 
-                if asset_type:
-                    group = "%ss" % asset_type  # eg. Characters
-                else:
-                    group = "%ss" % entity_type  # eg. Shots
+            group = get_group_name(d)
 
-                # it is an asset, so group by asset type
-                if group not in groups:
-                    groups[group] = []
-                groups[group].append(d)
+            # item has a publish in sg
+            i = self._add_item_to_group(group, BreakdownListItem)
+            self._set_item_data(i, d)
+            self._item_count += 1
 
+            if d.get("sg_data"):
+                versioned_items.append((i, d))
             else:
-                # everything not in shotgun goes into the other bucket
-                OTHER_ITEMS = "Unpublished Items"
-                if OTHER_ITEMS not in groups:
-                    groups[OTHER_ITEMS] = []
-                groups[OTHER_ITEMS].append(d)
-
-        ################################################################################
-        # PASS 2 - display the content of all groups
-
-        if sgtk.util.get_published_file_entity_type(self._app.sgtk) == "PublishedFile":
-            published_file_type_field = "published_file_type"
-        else:  # == "TankPublishedFile"
-            published_file_type_field = "tank_type"
-
-        # now iterate through the groups
-        for group in sorted(groups.keys()):
-
-            i = self.add_item(browser_widget.ListHeader)
-            i.set_title(group)
-            for d in groups[group]:
-
-                # item has a publish in sg
-                i = self.add_item(BreakdownListItem)
-
-                # provide a limited amount of data for receivers via the
-                # data dictionary on
-                # the item object
-                i.data = {
-                    "node_name": d["node_name"],
-                    "node_type": d["node_type"],
-                    "template": d["template"],
-                    "fields": d["fields"],
-                    "sg_data": d.get("sg_data", None),
-                    "seq_str": d.get("seq_str", None)
-                }
-
-                # populate the description
-                details = []
-
-                if d.get("sg_data"):
-
-                    sg_data = d["sg_data"]
-                    step = sg_data.get("task.Task.step.Step.code", None)
-                    if step is not None:
-                        details.append(
-                            self._make_row(
-                            "Item",
-                            "%s, Version %d, %s Task"
-                            % (sg_data["name"], sg_data["version_number"], step)
-                            )
-                        )
-                    else:
-                        details.append(
-                            self._make_row(
-                                "Item",
-                                "%s, Version %d"
-                                % (sg_data["name"], sg_data["version_number"]),
-                            )
-                        )
-
-                    # see if this publish is associated with an entity
-                    linked_entity = sg_data.get("entity")
-                    if linked_entity:
-                        display_name = shotgun_globals.get_type_display_name(
-                            linked_entity["type"]
-                        )
-
-                        details.append(
-                            self._make_row(display_name, linked_entity["name"])
-                        )
-
-                    # does it have a tank type ?
-                    if sg_data.get(published_file_type_field):
-                        details.append(
-                            self._make_row(
-                                "Type",
-                                sg_data.get(published_file_type_field).get("name"),
-                            )
-                        )
-                else:
-                    if d["fields"] is not None:
-                        details.append(self._make_row("Version", d["fields"]["version"]))
-
-                        # display some key fields in the widget
-                        # todo: make this more generic?
-                        relevant_fields = ["Shot", "Asset", "Step", "Sequence", "name"]
-
-                        for (k, v) in d["fields"].items():
-                            # only show relevant fields - a bit of a hack
-                            if k in relevant_fields:
-                                details.append(self._make_row(k, v))
-
-                #  add full path for for everything not published
-                if not details:
-                    details.append(self._make_row("Path", d["path"]))
-                details.append(self._make_row("Node", d["node_name"]))
-                inner = "".join(details)
-
-                i.set_details("<table>%s</table>" % inner)
-
-                # finally, ask the node to calculate its red-green status
-                # this will happen asynchronously.
-                i.calculate_status(
-                    d["template"],
-                    d["fields"],
-                    result["show_red"],
-                    result["show_green"],
-                    d.get("sg_data", None),
+                # nothing to resolve, the status is known straight away
+                self._calculate_status(i, d, None)
+
+        # the latest versions of the chunk are resolved in bulk by the status
+        # worker pool, the statuses are then computed from them
+        if versioned_items:
+            uid = self._status_pool.queue_work(
+                self._compute_chunk_versions, [d for (_, d) in versioned_items]
+            )
+            self._versions_by_uid[uid] = versioned_items
+
+    def _compute_chunk_versions(self, items):
+        """
+        Resolves the latest versions of a chunk of items. This is run in a
+        status worker thread.
+        """
+        return breakdown.compute_chunk_versions(self._app, items)
+
+    def _calculate_status(self, i, d, latest_version):
+        """
+        Asks a list item to calculate its red-green status. This will happen
+        asynchronously.
+
+        :param i: BreakdownListItem to compute the status of
+        :param dict d: Breakdown item of the list item
+        :param latest_version: The latest version if already resolved
+        """
+        i.calculate_status(
+            d["template"],
+            d["fields"],
+            self._show_red,
+            self._show_green,
+            d.get("sg_data", None),
+            latest_version,
+        )
+
+    def _add_item_to_group(self, group, item_class):
+        """
+        Adds an item at the end of a group, creating the group header if needed.
+        Groups are kept sorted by name as they are created.
+
+        :param str group: Name of the group
+        :param item_class: Class of the item to add
+        :returns: The item added
+        """
+        if group not in self._groups:
+            header = self.add_item(browser_widget.ListHeader)
+            header.set_title(group)
+            following_groups = [name for name in self._groups if name > group]
+            if following_groups:
+                self._move_widget(
+                    header, self._groups[min(following_groups)][0], before=True
+                )
+            else:
+                self._last_widget = header
+            self._groups[group] = [header, header]
+
+        i = self.add_item(item_class)
+        group_data = self._groups[group]
+        # items of the last group are already added at the right place
+        if group_data[1] is not self._last_widget:
+            self._move_widget(i, group_data[1], before=False)
+        else:
+            self._last_widget = i
+        group_data[1] = i
+        return i
+
+    def _move_widget(self, widget, anchor, before):
+        """
+        Moves a widget of the list next to another one.
+
+        :param widget: Widget to move
+        :param anchor: Widget to move it next to
+        :param bool before: Whether the widget goes before or after the anchor
+        """
+        layout = widget.parentWidget().layout()
+        layout.removeWidget(widget)
+        index = layout.indexOf(anchor)
+        if not before:
+            index += 1
+        layout.insertWidget(index, widget)
+
+    def set_filters(self, show_red, show_green):
+        """
+        Applies the red/green filters to the items already in the list.
+
+        The statuses computed so far are reused, nothing is scanned or
+        computed again.
+
+        :param bool show_red: Whether out of date items should be shown
+        :param bool show_green: Whether up to date items should be shown
+        """
+        # items still being streamed in use the new filters as well
+        self._show_red = show_red
+        self._show_green = show_green
+
+        # avoid a relayout for each of the items shown or hidden
+        self.setUpdatesEnabled(False)
+        try:
+            for i in self.get_items():
+                if isinstance(i, BreakdownListItem):
+                    i.set_filters(show_red, show_green)
+        finally:
+            self.setUpdatesEnabled(True)
+        # items shown again may need their thumbnail
+        self._visibility_timer.start()
+
+    def refresh_items(self, updated_items, show_red, show_green, update_id=None):
+        """
+        Refreshes the given items after they were updated in the scene.
+
+        Only these items are resolved again, in the status worker pool, the
+        rest of the list and the statuses which were already computed are left
+        untouched. If some items can't be resolved again, the list is reloaded.
+
+        :param updated_items: List of (BreakdownListItem, scene object, latest version)
+                              tuples, the scene object being a dictionary with
+                              node, type and path keys for the updated node.
+        :param bool show_red: Whether out of date items should be shown
+        :param bool show_green: Whether up to date items should be shown
+        :param str update_id: Correlation id of the timing spans of the update
+        """
+        self._show_red = show_red
+        self._show_green = show_green
+        if not updated_items:
+            self._on_items_refreshed(updated_items, update_id, {})
+            return
+
+        uid = self._status_pool.queue_work(
+            self._resolve_updated_items,
+            {
+                "scene_objects": [so for (_, so, _) in updated_items],
+                "update_id": update_id,
+            },
+        )
+        self._refreshes_by_uid[uid] = (updated_items, update_id)
+
+    def _resolve_updated_items(self, data):
+        """
+        Resolves the updated scene objects again. This is run in a status
+        worker thread.
+        """
+        return resolve_updated_items(
+            self._app, data["scene_objects"], data["update_id"]
+        )
+
+    def _on_items_refreshed(self, updated_items, update_id, resolved_by_node):
+        """
+        Updates the refreshed items with their resolved data, reloading the
+        list if some of them couldn't be resolved again.
+        """
+        reload_list = False
+        for (i, scene_object, latest_version) in updated_items:
+            d = resolved_by_node.get((scene_object["type"], scene_object["node"]))
+            if d is None:
+                reload_list = True
+                break
+
+            self._set_item_data(i, d)
+            # we just updated to the latest version, so there is no need
+            # to look for it again
+            self._calculate_status(i, d, latest_version)
+
+        if self._app.get_setting("log_timings"):
+            get_span_recorder().log_summary(self._app, update_id)
+        if reload_list:
+            self.clear()
+            self.load({"show_red": self._show_red, "show_green": self._show_green})
+
+    def _set_item_data(self, i, d):
+        """
+        Populates a list item from a breakdown item.
+
+        :param i: BreakdownListItem to populate
+        :param dict d: Breakdown item, as returned by get_breakdown_items()
+        """
+        # provide a limited amount of data for receivers via the
+        # data dictionary on
+        # the item object
+        i.data = get_item_data(d)
+        i.set_details(get_item_details(self._app, d))
+
+
+def get_next_chunk(app, data):
+    """
+    Resolves the next chunk of breakdown items. This is run in a worker thread.
+
+    :param app: The breakdown app instance
+    The latest versions are not resolved here, each chunk is resolved in bulk
+    by the status worker pool so that the scan moves on to the next chunk.
+
+    :param dict data: Dictionary holding the chunks generator, as returned by
+                      iter_breakdown_items(), in its chunks key.
+    :returns: The same dictionary, with the items of the chunk in its items
+              key. The items key is None once all the chunks have been resolved.
+    """
+    items = next(data["chunks"], None)
+
+    result = dict(data)
+    result["items"] = items
+    return result
+
+
+def resolve_updated_items(app, scene_objects, update_id=None):
+    """
+    Resolves the scene objects of updated items again. This is run in a
+    worker thread.
+
+    :param app: The breakdown app instance
+    :param list scene_objects: Dictionaries with node, type and path keys
+    :param str update_id: Correlation id of the timing spans of the update
+    :returns: Dictionary of breakdown items keyed by (node type, node name)
+    """
+    with get_span_recorder().span("refresh", update_id, items=len(scene_objects)):
+        resolved_items = breakdown.get_breakdown_items(scene_objects)
+    return dict(((d["node_type"], d["node_name"]), d) for d in resolved_items)
+
+
+def get_group_name(d):
+    """
+    Returns the name of the group a breakdown item is listed under.
+
+    :param dict d: Breakdown item, as returned by get_breakdown_items()
+    :returns: Group name, for example Characters or Shots
+    """
+    if not d.get("sg_data"):
+        # everything not in shotgun goes into the other bucket
+        return "Unpublished Items"
+
+    # publish in shotgun!
+    sg_data = d["sg_data"]
+
+    entity = sg_data.get("entity")
+    if entity is None:
+        entity_type = "Unknown Type"
+    else:
+        entity_type = entity["type"]
+
+    asset_type = sg_data["entity.Asset.sg_asset_type"]
+
+    if asset_type:
+        return "%ss" % asset_type  # eg. Characters
+    else:
+        return "%ss" % entity_type  # eg. Shots
+
+
+def get_item_data(d):
+    """
+    Returns the data stored on a list item for a breakdown item.
+
+    :param dict d: Breakdown item, as returned by get_breakdown_items()
+    :returns: Dictionary with the keys used when updating the item
+    """
+    return {
+        "node_name": d["node_name"],
+        "node_type": d["node_type"],
+        "path": d["path"],
+        "template": d["template"],
+        "fields": d["fields"],
+        "sg_data": d.get("sg_data", None),
+        "seq_str": d.get("seq_str", None),
+        "scan_id": d.get("scan_id", None),
+    }
+
+
+def get_item_details(app, d):
+    """
+    Returns the description displayed for a breakdown item.
+
+    :param app: The breakdown app instance
+    :param dict d: Breakdown item, as returned by get_breakdown_items()
+    :returns: HTML table describing the item
+    """
+    if sgtk.util.get_published_file_entity_type(app.sgtk) == "PublishedFile":
+        published_file_type_field = "published_file_type"
+    else:  # == "TankPublishedFile"
+        published_file_type_field = "tank_type"
+
+    # populate the description
+    details = []
+
+    if d.get("sg_data"):
+
+        sg_data = d["sg_data"]
+        step = sg_data.get("task.Task.step.Step.code", None)
+        if step is not None:
+            details.append(
+                _make_row(
+                "Item",
+                "%s, Version %d, %s Task"
+                % (sg_data["name"], sg_data["version_number"], step)
+                )
+            )
+        else:
+            details.append(
+                _make_row(
+                    "Item",
+                    "%s, Version %d"
+                    % (sg_data["name"], sg_data["version_number"]),
+                )
+            )
+
+        # see if this publish is associated with an entity
+        linked_entity = sg_data.get("entity")
+        if linked_entity:
+            display_name = shotgun_globals.get_type_display_name(
+                linked_entity["type"]
+            )
+
+            details.append(
+                _make_row(display_name, linked_entity["name"])
+            )
+
+        # does it have a tank type ?
+        if sg_data.get(published_file_type_field):
+            details.append(
+                _make_row(
+                    "Type",
+                    sg_data.get(published_file_type_field).get("name"),
                 )
+            )
+    else:
+        if d["fields"] is not None:
+            details.append(_make_row("Version", d["fields"]["version"]))
+
+            # display some key fields in the widget
+            # todo: make this more generic?
+            relevant_fields = ["Shot", "Asset", "Step", "Sequence", "name"]
+
+            for (k, v) in d["fields"].items():
+                # only show relevant fields - a bit of a hack
+                if k in relevant_fields:
+                    details.append(_make_row(k, v))
+
+    #  add full path for for everything not published
+    if not details:
+        details.append(_make_row("Path", d["path"]))
+    details.append(_make_row("Node", d["node_name"]))
+    inner = "".join(details)
+
+    return "<table>%s</table>" % inner
+
+
+def _make_row(first, second):
+    return "<tr><td><b>%s</b>&nbsp;&nbsp;&nbsp;</td><td>%s</td></tr>" % (
+        first,
+        second,
+    )
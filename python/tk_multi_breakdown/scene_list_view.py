@@ -0,0 +1,752 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import collections
+
+from sgtk.platform.qt import QtCore, QtGui
+
+from . import breakdown
+from .breakdown import get_latest_camera_path
+from .breakdown_list_item import compute_status
+from .scene_browser import (
+    get_next_chunk,
+    get_group_name,
+    get_item_data,
+    get_item_details,
+    resolve_updated_items,
+)
+from .status_pool import StatusWorkerPool
+from .thumbnail_cache import (
+    download_thumbnail,
+    NO_THUMBNAIL,
+    THUMBNAIL_WORKER_COUNT,
+)
+from .thumbnail_image import get_thumbnail_image, THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT
+from .timing import get_span_recorder
+
+
+class SceneListItem(object):
+    """
+    A breakdown item displayed in the :class:`SceneListView`.
+
+    This is a light weight equivalent of the BreakdownListItem widget: it holds
+    the item data and status, the view paints it through its delegate.
+    """
+
+    def __init__(self, view, app, d):
+        """
+        Construction
+
+        :param view: The SceneListView displaying the item
+        :param app: The breakdown app instance
+        :param dict d: Breakdown item, as returned by get_breakdown_items()
+        """
+        self._view = view
+        self._app = app
+        self.group = get_group_name(d)
+        self.index = None
+        self.thumbnail = None
+        self._thumbnail_url = None
+        self._thumbnail_requested = False
+        self._thumbnail_worker_uid = None
+        self._latest_version = None
+        self._is_latest = None
+        self._worker_uid = None
+        self.set_data(d)
+
+    def set_data(self, d):
+        """
+        Sets the breakdown item displayed.
+
+        :param dict d: Breakdown item, as returned by get_breakdown_items()
+        """
+        self.data = get_item_data(d)
+        self.details = get_item_details(self._app, d)
+
+    def get_latest_version_number(self):
+        # returns none if not yet determined
+        return self._latest_version
+
+    def is_latest_version(self):
+        # returns none if not yet determined
+        return self._is_latest
+
+    def is_out_of_date(self):
+        # returns none if not yet determined
+        if self._is_latest is None:
+            return None
+        else:
+            return self._is_latest == False
+
+    def is_selected(self):
+        return self._view.is_selected(self)
+
+    def calculate_status(
+        self,
+        template,
+        fields,
+        show_red,
+        show_green,
+        entity_dict=None,
+        latest_version=None,
+    ):
+        """
+        Figure out if this is a red or a green one. Also get thumb if possible.
+
+        The red/green filters are applied by the view, they are only accepted
+        here for compatibility with the BreakdownListItem interface.
+        """
+        self._template = template
+        self._fields = fields
+        self._sg_data = entity_dict
+        self._resolved_latest_version = latest_version
+        # forget the previous status, the item may not have a publish anymore
+        self._is_latest = None
+        self._latest_version = None
+        self._worker_uid = self._view.queue_item_work(self, self._calculate_status)
+
+    def _calculate_status(self, data):
+        """
+        The computational payload that figures out the status for this item.
+        This is run in a worker thread. Thumbnails are not downloaded here, the
+        list only fetches them for the rows being painted.
+        """
+        scan_id = self.data.get("scan_id")
+        with get_span_recorder().span("status", scan_id):
+            output = compute_status(
+                self._template,
+                self._fields,
+                self._sg_data,
+                self._resolved_latest_version,
+                scan_id,
+            )
+
+        if output:
+            self._latest_version = output["latest_version"]
+            self._is_latest = output["up_to_date"]
+
+        return output
+
+    def _on_worker_failure(self, uid, msg):
+        if self._worker_uid != uid:
+            # not our job. ignore
+            return
+
+        # show error message
+        self._app.log_warning("Worker error: %s" % msg)
+
+    def _on_worker_task_complete(self, uid, data):
+        """
+        Called when the computation is complete and we should update the view
+        with the result
+        """
+        if uid != self._worker_uid:
+            return
+
+        if data:
+            # the thumbnail is loaded by the delegate once the item is painted
+            thumbnail_url = (self._sg_data or {}).get("image")
+            if thumbnail_url != self._thumbnail_url:
+                self._thumbnail_url = thumbnail_url
+                self._thumbnail_requested = False
+                self.thumbnail = None
+
+        self._view.item_changed(self)
+
+    def needs_thumbnail(self):
+        """
+        :returns: True if the item has a thumbnail which hasn't been requested yet
+        """
+        return bool(self._thumbnail_url) and not self._thumbnail_requested
+
+    def load_thumbnail(self):
+        """
+        Downloads the thumbnail of the item in the background. This is called by
+        the delegate the first time the item is painted.
+        """
+        self._thumbnail_requested = True
+        self._thumbnail_worker_uid = self._view.queue_item_thumbnail(
+            self, self._load_thumbnail
+        )
+
+    def _load_thumbnail(self, data):
+        """
+        Downloads the thumbnail, then decodes and scales it to its display size.
+        This is run in a thumbnail worker thread.
+        """
+        with get_span_recorder().span("thumbnail", self.data.get("scan_id")):
+            path = download_thumbnail(self._thumbnail_url) or NO_THUMBNAIL
+            return {"image": get_thumbnail_image(path)}
+
+    def _on_thumbnail_complete(self, uid, data):
+        """
+        Called when the thumbnail has been downloaded.
+        """
+        if uid != self._thumbnail_worker_uid:
+            return
+
+        self.thumbnail = QtGui.QPixmap.fromImage(data["image"])
+        self._view.item_changed(self)
+
+    def get_latest_camera(self):
+        """
+        Get the file path of the highest camera version found on disk.
+
+        :returns: String containing the camera file path
+        """
+        return get_latest_camera_path(self._template, self._fields)
+
+
+class _GroupHeader(object):
+    """
+    Header row of a group in the :class:`SceneModel`.
+    """
+
+    def __init__(self, title):
+        self.title = title
+        self.index = None
+
+
+class SceneModel(QtCore.QAbstractListModel):
+    """
+    Flat model holding the group headers and breakdown items of the scene.
+
+    Groups are kept sorted by name, items are appended at the end of their group.
+    """
+
+    # role returning the SceneListItem or _GroupHeader of a row
+    ITEM_ROLE = QtCore.Qt.UserRole + 1
+
+    def __init__(self, parent=None):
+        QtCore.QAbstractListModel.__init__(self, parent)
+        self._rows = []
+        # group name -> [header, number of items in the group]
+        self._groups = {}
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == self.ITEM_ROLE:
+            return row
+        if role == QtCore.Qt.DisplayRole:
+            if isinstance(row, _GroupHeader):
+                return row.title
+            return row.data["node_name"]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        if isinstance(self._rows[index.row()], _GroupHeader):
+            return QtCore.Qt.ItemIsEnabled
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+    def clear(self):
+        """
+        Removes all the rows.
+        """
+        self.beginResetModel()
+        self._rows = []
+        self._groups = {}
+        self.endResetModel()
+
+    def get_items(self):
+        """
+        :returns: List of all the SceneListItem in the model
+        """
+        return [row for row in self._rows if isinstance(row, SceneListItem)]
+
+    def add_items(self, items):
+        """
+        Adds items at the end of their groups, creating the groups as needed.
+
+        Rows are inserted with a single insertion per group, so adding a chunk
+        of items only updates the existing indexes a few times.
+
+        :param items: List of SceneListItem to add
+        """
+        items_by_group = collections.OrderedDict()
+        for item in items:
+            items_by_group.setdefault(item.group, []).append(item)
+
+        for (group, group_items) in items_by_group.items():
+            if group not in self._groups:
+                header = _GroupHeader(group)
+                row = self._get_group_row(group)
+                self.beginInsertRows(QtCore.QModelIndex(), row, row)
+                self._rows.insert(row, header)
+                self._groups[group] = [header, 0]
+                self.endInsertRows()
+                header.index = QtCore.QPersistentModelIndex(self.index(row))
+
+            group_data = self._groups[group]
+            first_row = group_data[0].index.row() + 1 + group_data[1]
+            last_row = first_row + len(group_items) - 1
+            self.beginInsertRows(QtCore.QModelIndex(), first_row, last_row)
+            self._rows[first_row:first_row] = group_items
+            group_data[1] += len(group_items)
+            self.endInsertRows()
+
+            for (offset, item) in enumerate(group_items):
+                item.index = QtCore.QPersistentModelIndex(self.index(first_row + offset))
+
+    def item_changed(self, item):
+        """
+        Notifies the views that an item was updated.
+
+        :param item: The SceneListItem which changed
+        """
+        if item.index is not None and item.index.isValid():
+            index = self.index(item.index.row())
+            self.dataChanged.emit(index, index)
+
+    def _get_group_row(self, group):
+        """
+        Returns the row a new group header should be inserted at to keep the
+        groups sorted.
+        """
+        return sum(
+            1 + count for (name, (_, count)) in self._groups.items() if name < group
+        )
+
+
+class SceneItemDelegate(QtGui.QStyledItemDelegate):
+    """
+    Paints the rows of the :class:`SceneModel`, the same way the widget based
+    list lays out its headers and items. Only the visible rows are painted.
+    """
+
+    HEADER_HEIGHT = 30
+    ITEM_HEIGHT = 65
+
+    def __init__(self, parent=None):
+        QtGui.QStyledItemDelegate.__init__(self, parent)
+        self._green_pixmap = QtGui.QPixmap(":/res/green_bullet.png")
+        self._red_pixmap = QtGui.QPixmap(":/res/red_bullet.png")
+        self._empty_pixmap = QtGui.QPixmap(":/res/empty_bullet.png")
+        self._no_thumb_pixmap = QtGui.QPixmap.fromImage(
+            get_thumbnail_image(NO_THUMBNAIL)
+        )
+        self._document = QtGui.QTextDocument()
+
+    def sizeHint(self, option, index):
+        row = index.data(SceneModel.ITEM_ROLE)
+        if isinstance(row, _GroupHeader):
+            return QtCore.QSize(option.rect.width(), self.HEADER_HEIGHT)
+        return QtCore.QSize(option.rect.width(), self.ITEM_HEIGHT)
+
+    def paint(self, painter, option, index):
+        row = index.data(SceneModel.ITEM_ROLE)
+        painter.save()
+        try:
+            if isinstance(row, _GroupHeader):
+                self._paint_header(painter, option, row)
+            else:
+                self._paint_item(painter, option, row)
+        finally:
+            painter.restore()
+
+    def _paint_header(self, painter, option, header):
+        font = QtGui.QFont(option.font)
+        font.setBold(True)
+        font.setPointSize(font.pointSize() + 2)
+        painter.setFont(font)
+        painter.setPen(option.palette.color(QtGui.QPalette.Text))
+        rect = option.rect.adjusted(4, 0, -4, 0)
+        painter.drawText(rect, QtCore.Qt.AlignLeft | QtCore.Qt.AlignBottom, header.title)
+
+    def _paint_item(self, painter, option, item):
+        rect = option.rect.adjusted(2, 2, -2, -2)
+        if option.state & QtGui.QStyle.State_Selected:
+            painter.fillRect(rect, option.palette.highlight())
+        else:
+            painter.fillRect(rect, option.palette.alternateBase())
+
+        # status light
+        if item.is_latest_version() is None:
+            light = self._empty_pixmap
+        elif item.is_latest_version():
+            light = self._green_pixmap
+        else:
+            light = self._red_pixmap
+        x = rect.left() + 10
+        painter.drawPixmap(x, rect.center().y() - light.height() // 2, light)
+        x += light.width() + 8
+
+        # thumbnail, already scaled and centered on a 60x40 canvas. only the
+        # painted items are visible, so this is where their thumbnail starts loading
+        if item.needs_thumbnail():
+            item.load_thumbnail()
+        thumbnail = item.thumbnail or self._no_thumb_pixmap
+        painter.drawPixmap(x, rect.center().y() - THUMBNAIL_HEIGHT // 2, thumbnail)
+        x += THUMBNAIL_WIDTH + 8
+
+        # details
+        self._document.setDefaultFont(option.font)
+        self._document.setHtml(item.details)
+        self._document.setTextWidth(rect.right() - x)
+        painter.translate(x, rect.center().y() - self._document.size().height() / 2)
+        self._document.drawContents(painter)
+
+
+class SceneListView(QtGui.QWidget):
+    """
+    Model/view based alternative to the SceneBrowserWidget, for very large scenes.
+
+    Only the visible rows are painted and no widgets are created per item. It
+    provides the same grouping, red/green status lights, filters, multi-selection
+    and the interface used by the dialog to update the selected items.
+    """
+
+    _item_work_completed = QtCore.Signal(str, object)
+    _item_work_failed = QtCore.Signal(str, str)
+
+    def __init__(self, parent=None):
+        QtGui.QWidget.__init__(self, parent)
+        self._app = None
+        self._scan_pool = None
+        self._status_pool = None
+        self._thumbnail_pool = None
+        self._show_red = True
+        self._show_green = True
+        self._reset_stream()
+
+        self._label = QtGui.QLabel(self)
+        self._message = QtGui.QLabel(self)
+        self._message.setAlignment(QtCore.Qt.AlignCenter)
+        self._message.setVisible(False)
+
+        self._model = SceneModel(self)
+        self._view = QtGui.QListView(self)
+        self._view.setModel(self._model)
+        self._view.setItemDelegate(SceneItemDelegate(self._view))
+        self._view.setVerticalScrollMode(QtGui.QAbstractItemView.ScrollPerPixel)
+        self._view.setSelectionMode(QtGui.QAbstractItemView.SingleSelection)
+
+        layout = QtGui.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self._label)
+        layout.addWidget(self._message)
+        layout.addWidget(self._view)
+
+    def set_app(self, app):
+        self._app = app
+        # the scene is analyzed in a single background thread, item statuses
+        # are computed concurrently by a pool of workers and thumbnails are
+        # downloaded by a separate pool at a lower priority
+        self._scan_pool = StatusWorkerPool(1, parent=self)
+        self._status_pool = StatusWorkerPool(
+            app.get_setting("status_worker_count"), parent=self
+        )
+        self._thumbnail_pool = StatusWorkerPool(
+            THUMBNAIL_WORKER_COUNT, parent=self, priority=QtCore.QThread.LowPriority
+        )
+        for pool in (self._scan_pool, self._status_pool, self._thumbnail_pool):
+            pool.work_completed.connect(
+                lambda uid, data: self._item_work_completed.emit(uid, data)
+            )
+            pool.work_failure.connect(
+                lambda uid, msg: self._item_work_failed.emit(uid, msg)
+            )
+        self._item_work_completed.connect(self._on_work_completed)
+        self._item_work_failed.connect(self._on_work_failed)
+
+    def set_label(self, label):
+        self._label.setText("<big>%s</big>" % label)
+
+    def set_message(self, message):
+        self._message.setText(message)
+        self._message.setVisible(True)
+
+    def enable_multi_select(self, enable):
+        if enable:
+            self._view.setSelectionMode(QtGui.QAbstractItemView.ExtendedSelection)
+        else:
+            self._view.setSelectionMode(QtGui.QAbstractItemView.SingleSelection)
+
+    def destroy(self):
+        for pool in (self._scan_pool, self._status_pool, self._thumbnail_pool):
+            if pool:
+                pool.stop()
+        self._scan_pool = None
+        self._status_pool = None
+        self._thumbnail_pool = None
+
+    ########################################################################################
+    # loading
+
+    def clear(self):
+        for pool in (self._scan_pool, self._status_pool, self._thumbnail_pool):
+            if pool:
+                pool.clear()
+        self._reset_stream()
+        self._message.setVisible(False)
+        self._model.clear()
+
+    def load(self, data):
+        """
+        Analyzes the scene and populates the list, chunk by chunk.
+
+        :param dict data: Dictionary with the show_red and show_green filters
+        """
+        self.clear()
+        self._show_red = data["show_red"]
+        self._show_green = data["show_green"]
+        self._chunk_work_uid = self._scan_pool.queue_work(self._get_first_chunk, data)
+
+    def _get_first_chunk(self, data):
+        data = dict(data)
+        data["chunks"] = breakdown.iter_breakdown_items()
+        return get_next_chunk(self._app, data)
+
+    def _get_next_chunk(self, data):
+        return get_next_chunk(self._app, data)
+
+    def _reset_stream(self):
+        self._chunk_work_uid = None
+        # worker uid -> list item the work was queued for
+        self._items_by_uid = {}
+        self._thumbnails_by_uid = {}
+        # worker uid -> list of (list item, breakdown item) tuples of a chunk
+        # whose versions are being resolved
+        self._versions_by_uid = {}
+        # worker uid -> (updated items, update correlation id) of a refresh
+        self._refreshes_by_uid = {}
+
+    def process_result(self, result):
+        """
+        Adds a chunk of resolved items to the list and requests the next one.
+        """
+        if result["items"] is None:
+            # all the chunks have been processed
+            self._chunk_work_uid = None
+            if not self._model.rowCount():
+                self.set_message("No versioned data in your scene!")
+            return
+
+        self._chunk_work_uid = self._scan_pool.queue_work(
+            self._get_next_chunk, result, asap=True
+        )
+
+        items = [SceneListItem(self, self._app, d) for d in result["items"]]
+        self._model.add_items(items)
+
+        versioned_items = []
+        for (item, d) in zip(items, result["items"]):
+            if d.get("sg_data"):
+                versioned_items.append((item, d))
+            else:
+                self._calculate_status(item, d, None)
+
+        # the latest versions of the chunk are resolved in bulk by the status
+        # worker pool, the statuses are then computed from them
+        if versioned_items:
+            uid = self._status_pool.queue_work(
+                self._compute_chunk_versions, [d for (_, d) in versioned_items]
+            )
+            self._versions_by_uid[uid] = versioned_items
+
+    def _compute_chunk_versions(self, items):
+        return breakdown.compute_chunk_versions(self._app, items)
+
+    def _calculate_status(self, item, d, latest_version):
+        item.calculate_status(
+            d["template"],
+            d["fields"],
+            self._show_red,
+            self._show_green,
+            d.get("sg_data", None),
+            latest_version,
+        )
+
+    def queue_item_work(self, item, worker_fn):
+        """
+        Queues work for a list item in the status worker pool.
+
+        :param item: The list item the work is done for
+        :param worker_fn: Method to run in a worker thread
+        :returns: The uid of the work queued
+        """
+        uid = self._status_pool.queue_work(worker_fn, {})
+        self._items_by_uid[uid] = item
+        return uid
+
+    def queue_item_thumbnail(self, item, worker_fn):
+        """
+        Queues a thumbnail download for a list item in the thumbnail worker pool.
+
+        :param item: The list item the thumbnail is loaded for
+        :param worker_fn: Method to run in a worker thread
+        :returns: The uid of the work queued
+        """
+        uid = self._thumbnail_pool.queue_work(worker_fn, {})
+        self._thumbnails_by_uid[uid] = item
+        return uid
+
+    def _on_work_completed(self, uid, data):
+        if uid == self._chunk_work_uid:
+            self.process_result(data)
+            return
+
+        item = self._items_by_uid.pop(uid, None)
+        if item is not None:
+            item._on_worker_task_complete(uid, data)
+            return
+
+        versioned_items = self._versions_by_uid.pop(uid, None)
+        if versioned_items is not None:
+            # items which couldn't be resolved in bulk are resolved per item
+            for ((item, d), latest_version) in zip(versioned_items, data):
+                self._calculate_status(item, d, latest_version)
+            return
+
+        refresh = self._refreshes_by_uid.pop(uid, None)
+        if refresh is not None:
+            self._on_items_refreshed(refresh[0], refresh[1], data)
+            return
+
+        item = self._thumbnails_by_uid.pop(uid, None)
+        if item is not None:
+            item._on_thumbnail_complete(uid, data)
+
+    def _on_work_failed(self, uid, msg):
+        if uid == self._chunk_work_uid:
+            self._chunk_work_uid = None
+            self._app.log_warning("Failed to analyze the scene: %s" % msg)
+            return
+
+        item = self._items_by_uid.pop(uid, None)
+        if item is not None:
+            item._on_worker_failure(uid, msg)
+            return
+
+        versioned_items = self._versions_by_uid.pop(uid, None)
+        if versioned_items is not None:
+            self._app.log_debug("Failed to resolve versions in bulk: %s" % msg)
+            for (item, d) in versioned_items:
+                self._calculate_status(item, d, None)
+            return
+
+        if self._refreshes_by_uid.pop(uid, None) is not None:
+            self._app.log_warning("Failed to refresh the updated items: %s" % msg)
+            self.load({"show_red": self._show_red, "show_green": self._show_green})
+            return
+
+        if self._thumbnails_by_uid.pop(uid, None) is not None:
+            self._app.log_debug("Failed to load thumbnail: %s" % msg)
+
+    ########################################################################################
+    # items, selection and filters
+
+    def get_items(self):
+        return self._model.get_items()
+
+    def get_selected_items(self):
+        return [
+            index.data(SceneModel.ITEM_ROLE)
+            for index in self._view.selectionModel().selectedRows()
+        ]
+
+    def is_selected(self, item):
+        return item.index is not None and self._view.selectionModel().isRowSelected(
+            item.index.row(), QtCore.QModelIndex()
+        )
+
+    def select(self, item):
+        if item.index is not None:
+            self._view.selectionModel().select(
+                self._model.index(item.index.row()), QtGui.QItemSelectionModel.Select
+            )
+
+    def item_changed(self, item):
+        """
+        Repaints an item and applies the filters once its status is known.
+        """
+        self._model.item_changed(item)
+        self._update_visibility(item)
+
+    def set_filters(self, show_red, show_green):
+        """
+        Applies the red/green filters to the items already in the list.
+
+        :param bool show_red: Whether out of date items should be shown
+        :param bool show_green: Whether up to date items should be shown
+        """
+        self._show_red = show_red
+        self._show_green = show_green
+        for item in self._model.get_items():
+            self._update_visibility(item)
+
+    def _update_visibility(self, item):
+        if item.index is None:
+            return
+        if item.is_latest_version() is None:
+            visible = True
+        elif item.is_latest_version():
+            visible = self._show_green
+        else:
+            visible = self._show_red
+        self._view.setRowHidden(item.index.row(), not visible)
+
+    def refresh_items(self, updated_items, show_red, show_green, update_id=None):
+        """
+        Refreshes the given items after they were updated in the scene. They
+        are resolved again in the status worker pool, and the list is reloaded
+        if some of them can't be.
+
+        :param updated_items: List of (SceneListItem, scene object, latest version)
+                              tuples, the scene object being a dictionary with
+                              node, type and path keys for the updated node.
+        :param bool show_red: Whether out of date items should be shown
+        :param bool show_green: Whether up to date items should be shown
+        :param str update_id: Correlation id of the timing spans of the update
+        """
+        self._show_red = show_red
+        self._show_green = show_green
+        if not updated_items:
+            self._on_items_refreshed(updated_items, update_id, {})
+            return
+
+        uid = self._status_pool.queue_work(
+            self._resolve_updated_items,
+            {
+                "scene_objects": [so for (_, so, _) in updated_items],
+                "update_id": update_id,
+            },
+        )
+        self._refreshes_by_uid[uid] = (updated_items, update_id)
+
+    def _resolve_updated_items(self, data):
+        return resolve_updated_items(
+            self._app, data["scene_objects"], data["update_id"]
+        )
+
+    def _on_items_refreshed(self, updated_items, update_id, resolved_by_node):
+        reload_list = False
+        for (item, scene_object, latest_version) in updated_items:
+            d = resolved_by_node.get((scene_object["type"], scene_object["node"]))
+            if d is None:
+                reload_list = True
+                break
+
+            item.set_data(d)
+            self._calculate_status(item, d, latest_version)
+            self.item_changed(item)
+
+        if self._app.get_setting("log_timings"):
+            get_span_recorder().log_summary(self._app, update_id)
+        if reload_list:
+            self.load({"show_red": self._show_red, "show_green": self._show_green})
@@ -0,0 +1,139 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import uuid
+import threading
+import traceback
+import collections
+
+from sgtk.platform.qt import QtCore
+
+
+class StatusWorkerPool(QtCore.QObject):
+    """
+    Bounded pool of worker threads computing the status of the breakdown items.
+
+    This follows the interface of the browser widget worker, but runs several
+    jobs concurrently. Status computations are mostly waiting on the disk or on
+    Shotgun, so running them in parallel shortens the time until all statuses
+    are known.
+
+    Results are emitted through the work_completed and work_failure signals.
+    The pool lives in the main thread, so these are delivered to the main thread
+    regardless of the worker thread the job ran in.
+    """
+
+    work_completed = QtCore.Signal(str, object)
+    work_failure = QtCore.Signal(str, str)
+
+    def __init__(self, size, parent=None, priority=QtCore.QThread.InheritPriority):
+        """
+        Construction
+
+        :param int size: Number of worker threads
+        :param parent: Parent QObject
+        :param priority: QThread priority of the worker threads
+        """
+        QtCore.QObject.__init__(self, parent)
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self._running = True
+
+        self._threads = []
+        for _ in range(max(size, 1)):
+            thread = _StatusWorkerThread(self)
+            thread.start(priority)
+            self._threads.append(thread)
+
+    def queue_work(self, worker_fn, params, asap=False):
+        """
+        Queues a job.
+
+        :param worker_fn: Function to run, called with params as its only argument
+        :param params: Parameters passed to the function
+        :param bool asap: Whether the job should be run before the ones already queued
+        :returns: The uid of the job
+        """
+        uid = uuid.uuid4().hex
+        with self._condition:
+            if asap:
+                self._queue.appendleft((uid, worker_fn, params))
+            else:
+                self._queue.append((uid, worker_fn, params))
+            self._condition.notify()
+        return uid
+
+    def clear(self):
+        """
+        Discards all the jobs which haven't started yet.
+        """
+        with self._condition:
+            self._queue.clear()
+
+    def stop(self):
+        """
+        Stops the worker threads, waiting for the running jobs to finish.
+        """
+        with self._condition:
+            self._running = False
+            self._queue.clear()
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.wait()
+        self._threads = []
+
+    def _get_next_job(self):
+        """
+        Waits for a job to run. This is called from the worker threads.
+
+        :returns: Tuple with the uid, function and parameters of the job, or
+                  None if the pool is stopping.
+        """
+        with self._condition:
+            while self._running and not self._queue:
+                self._condition.wait()
+            if not self._running:
+                return None
+            return self._queue.popleft()
+
+    def _run_job(self, uid, worker_fn, params):
+        """
+        Runs a job and emits its result. This is called from the worker threads.
+        """
+        try:
+            data = worker_fn(params)
+        except Exception as e:
+            self.work_failure.emit(
+                uid, "%s\n%s" % (e, traceback.format_exc())
+            )
+        else:
+            self.work_completed.emit(uid, data)
+
+
+class _StatusWorkerThread(QtCore.QThread):
+    """
+    Worker thread of the :class:`StatusWorkerPool`.
+    """
+
+    def __init__(self, pool):
+        """
+        Construction
+
+        :param pool: The pool the thread takes its jobs from
+        """
+        QtCore.QThread.__init__(self)
+        self._pool = pool
+
+    def run(self):
+        while True:
+            job = self._pool._get_next_job()
+            if job is None:
+                return
+            self._pool._run_job(*job)
@@ -0,0 +1,265 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import re
+import threading
+import collections
+
+import sgtk
+
+# each digit is collapsed when computing the shape of a file name, so that
+# versions and frames of the same file and padding share the same shape
+SHAPE_REGEX = re.compile(r"\d")
+
+# maximum number of memoized shapes, the least recently used ones are
+# discarded first
+MAX_MEMO_SIZE = 100000
+
+
+class TemplatePrefixIndex(object):
+    """
+    Trie indexing templates by the static prefix of their path.
+
+    The static prefix of a template is its root path followed by the part of
+    its definition before the first key or optional section, as shared by all
+    the variations of the definition. Only the templates whose prefix starts
+    the path can possibly match it, which usually leaves a handful of
+    candidates out of the whole configuration.
+    """
+
+    def __init__(self, templates):
+        """
+        Construction
+
+        :param templates: List of templates to index
+        """
+        # each node is a list holding the children nodes, keyed by character,
+        # and the templates whose prefix ends at this node
+        self._root = [{}, []]
+        # templates without a static prefix are candidates for every path
+        self._unprefixed_templates = []
+
+        for template in templates:
+            prefix = self._get_static_prefix(template)
+            if not prefix:
+                self._unprefixed_templates.append(template)
+                continue
+
+            node = self._root
+            for char in prefix:
+                node = node[0].setdefault(char, [{}, []])
+            node[1].append(template)
+
+    def get_candidates(self, path):
+        """
+        Returns the templates which can possibly match a path.
+
+        :param str path: Path to match
+        :returns: List of candidate templates
+        """
+        candidates = list(self._unprefixed_templates)
+        node = self._root
+        for char in self._normalize(path):
+            node = node[0].get(char)
+            if node is None:
+                break
+            candidates.extend(node[1])
+        return candidates
+
+    def _get_static_prefix(self, template):
+        """
+        Returns the static prefix of a template.
+
+        :param template: Template to compute the prefix for
+        :returns: Normalized prefix, empty for templates without a root path
+        """
+        root_path = getattr(template, "root_path", None)
+        if not root_path:
+            return ""
+
+        # the definition of a template with optional sections is its longest
+        # variation, so the prefix shared by all the variations is used
+        prefixes = []
+        for definition in getattr(template, "_definitions", [template.definition]):
+            for marker in ("{", "["):
+                if marker in definition:
+                    definition = definition[: definition.index(marker)]
+            prefixes.append(definition)
+
+        return self._normalize(
+            os.path.join(root_path, os.path.commonprefix(prefixes))
+        )
+
+    def _normalize(self, path):
+        """
+        Normalizes a path for the prefix comparisons.
+
+        Separators are unified and the path is lower cased. This can only add
+        candidates, the candidates are validated against the path afterwards.
+
+        :param str path: Path to normalize
+        :returns: Normalized path
+        """
+        return path.replace("\\", "/").lower()
+
+
+class TemplateMatcher(object):
+    """
+    Memoized equivalent of Sgtk.template_from_path().
+
+    Results are memoized per parent directory and file name shape, the file
+    name with each of its digits collapsed. Paths which don't match any template
+    are memoized as well, so files from outside the pipeline only go through the
+    full template matching once per directory and shape. At most max_size
+    shapes are memoized, the least recently used ones being discarded first.
+
+    Memoized templates are validated against each path, as a template may
+    reject some digit values, a version outside of a key's choices for
+    example. Memoized misses are reused without validation: paths of the same
+    shape only differ by their digit values, and the templates which rejected
+    the first path can only accept another one if one of their keys restricts
+    the digit values it accepts. The file names of pipeline templates don't
+    rely on such restrictions, and paths rejected this way would also be
+    reported as unpublished by the rest of the breakdown.
+
+    Paths which aren't memoized are only validated against the templates whose
+    static prefix matches, as found by a :class:`TemplatePrefixIndex` built once
+    for the session.
+    """
+
+    def __init__(self, tk, max_size=MAX_MEMO_SIZE):
+        """
+        Construction
+
+        :param tk: Sgtk instance holding the templates to match against
+        :param int max_size: Maximum number of memoized shapes
+        """
+        self._tk = tk
+        self._index = None
+        self._memo = collections.OrderedDict()
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def tk(self):
+        """
+        The Sgtk instance holding the templates matched against.
+        """
+        return self._tk
+
+    def template_from_path(self, path):
+        """
+        Returns the template matching a path.
+
+        :param str path: Path to match
+        :returns: The matching template or None if no templates match
+        :raises: TankError if more than one template matches, like
+                 Sgtk.template_from_path() does.
+        """
+        (directory, file_name) = os.path.split(path)
+        key = (directory, SHAPE_REGEX.sub("#", file_name))
+
+        with self._lock:
+            memoized = self._memo.pop(key, False)
+            if memoized is not False:
+                # re-insert the entry so it is the most recently used one
+                self._memo[key] = memoized
+
+        # a memoized template is only a candidate: file names of the same shape
+        # still differ in their digit values
+        if memoized is None or (memoized and memoized.validate(path)):
+            with self._lock:
+                self._hits += 1
+            return memoized
+
+        template = self._match(path)
+        with self._lock:
+            self._misses += 1
+            # a path failing the validation of a memoized template must not
+            # hide that template from the other paths of the same shape
+            if template is not None or key not in self._memo:
+                self._memo.pop(key, None)
+                self._memo[key] = template
+                while len(self._memo) > self._max_size:
+                    self._memo.popitem(last=False)
+        return template
+
+    def clear(self):
+        """
+        Discards the memoized results. The prefix index is kept, as it only
+        depends on the templates.
+        """
+        with self._lock:
+            self._memo.clear()
+
+    def _match(self, path):
+        """
+        Matches a path against the candidate templates of the prefix index.
+
+        :param str path: Path to match
+        :returns: The matching template or None if no templates match
+        :raises: TankError if more than one template matches
+        """
+        with self._lock:
+            if self._index is None:
+                self._index = TemplatePrefixIndex(list(self._tk.templates.values()))
+            index = self._index
+
+        matched = [
+            template
+            for template in index.get_candidates(path)
+            if template.validate(path)
+        ]
+        if not matched:
+            return None
+        if len(matched) > 1:
+            raise sgtk.TankError(
+                "%d templates are matching the path '%s'.\n"
+                "The overlapping templates are:\n%s"
+                % (len(matched), path, "\n".join([str(x) for x in matched]))
+            )
+        return matched[0]
+
+    def stats(self):
+        """
+        Returns the memoization statistics.
+
+        :returns: Dictionary with hits, misses and size keys
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "size": len(self._memo),
+            }
+
+
+# the matcher for the current Sgtk instance, shared by all the scans
+g_template_matcher = None
+
+
+def get_template_matcher(tk):
+    """
+    Returns the template matcher for a Sgtk instance.
+
+    The matcher is kept for the whole session and only rebuilt if the
+    Sgtk instance changes, for example after a context change to another
+    project.
+
+    :param tk: Sgtk instance holding the templates to match against
+    :returns: :class:`TemplateMatcher` instance
+    """
+    global g_template_matcher
+    if g_template_matcher is None or g_template_matcher.tk is not tk:
+        g_template_matcher = TemplateMatcher(tk)
+    return g_template_matcher
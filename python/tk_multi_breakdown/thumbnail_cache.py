@@ -0,0 +1,301 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import uuid
+import hashlib
+import threading
+import collections
+
+import sgtk
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit
+
+# thumbnail displayed for the items without any thumbnail
+NO_THUMBNAIL = ":/res/no_thumb.png"
+
+# number of threads downloading thumbnails, at a lower priority than the
+# threads computing the item statuses
+THUMBNAIL_WORKER_COUNT = 2
+
+
+class ThumbnailCache(object):
+    """
+    Shared on disk cache of the thumbnails downloaded from Shotgun.
+
+    Thumbnails are keyed by their url without its query string: Shotgun signs the
+    thumbnail urls, so the same image is served with a different query string
+    every time it is requested. Items sharing the same image, for example all
+    the nodes using publishes of the same entity, share the same cached file.
+
+    Concurrent requests for the same thumbnail are deduplicated: the first one
+    downloads the image while the others wait for it to complete.
+
+    The cache holds at most max_size bytes, the least recently used thumbnails
+    being removed first. Cached files are kept between sessions, so opening the
+    breakdown again doesn't hit the network for the thumbnails already cached.
+    """
+
+    def __init__(self, cache_dir, max_size):
+        """
+        Construction
+
+        :param str cache_dir: Directory the thumbnails are stored in
+        :param int max_size: Maximum size of the cache, in bytes
+        """
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        # cache key -> event set once the download is complete
+        self._in_flight = {}
+        # cache key -> size, least recently used first, read from disk on first use
+        self._entries = None
+        self._total_size = 0
+        self._hits = 0
+        self._misses = 0
+        self._deduplicated = 0
+        self._evictions = 0
+
+    def configure(self, cache_dir, max_size):
+        """
+        Updates the cache location and size, evicting thumbnails if the cache
+        is now too big.
+
+        :param str cache_dir: Directory the thumbnails are stored in
+        :param int max_size: Maximum size of the cache, in bytes
+        """
+        with self._lock:
+            if cache_dir != self._cache_dir:
+                self._cache_dir = cache_dir
+                self._entries = None
+            self._max_size = max_size
+            if self._entries is not None:
+                self._evict()
+
+    def get_thumbnail(self, url, download_fn):
+        """
+        Returns the local path of a thumbnail, downloading it if it isn't cached.
+
+        :param str url: Url of the thumbnail
+        :param download_fn: Callable taking the url and a path to download it to
+        :returns: Path to the cached thumbnail, None if it couldn't be downloaded
+        """
+        key = self._get_key(url)
+
+        while True:
+            with self._lock:
+                self._load_entries()
+                path = self._get_path(key)
+                if key in self._entries and os.path.exists(path):
+                    self._hits += 1
+                    self._touch(key, path)
+                    return path
+
+                event = self._in_flight.get(key)
+                if event is None:
+                    # nobody is downloading this thumbnail, we do
+                    event = threading.Event()
+                    self._in_flight[key] = event
+                    self._misses += 1
+                    break
+                self._deduplicated += 1
+
+            # another thread is downloading the thumbnail, wait for it and
+            # look it up again
+            event.wait()
+            with self._lock:
+                if key not in self._entries:
+                    # the download failed, don't try again for this request
+                    return None
+
+        try:
+            return self._download(key, url, download_fn)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            event.set()
+
+    def stats(self):
+        """
+        Returns the cache statistics.
+
+        :returns: Dictionary with hits, misses, deduplicated, evictions, size
+                  and bytes keys
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "deduplicated": self._deduplicated,
+                "evictions": self._evictions,
+                "size": len(self._entries or {}),
+                "bytes": self._total_size,
+            }
+
+    def _download(self, key, url, download_fn):
+        """
+        Downloads a thumbnail into the cache.
+
+        The thumbnail is downloaded to a temporary file first, so that other
+        processes never see a partially written thumbnail.
+
+        :returns: Path to the cached thumbnail
+        """
+        path = self._get_path(key)
+        folder = os.path.dirname(path)
+        if not os.path.isdir(folder):
+            try:
+                os.makedirs(folder)
+            except OSError:
+                # created concurrently by another process
+                if not os.path.isdir(folder):
+                    raise
+
+        tmp_path = "%s.%s.tmp" % (path, uuid.uuid4().hex)
+        try:
+            download_fn(url, tmp_path)
+            if hasattr(os, "replace"):
+                # unlike rename, replace overwrites a thumbnail written
+                # concurrently by another process on Windows as well
+                os.replace(tmp_path, path)
+            elif os.path.exists(path):
+                # already downloaded by another process, keep its copy
+                os.remove(tmp_path)
+            else:
+                os.rename(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            self._load_entries()
+            size = os.path.getsize(path)
+            self._total_size -= self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._total_size += size
+            self._evict()
+        return path
+
+    def _get_key(self, url):
+        """
+        Returns the cache key of a thumbnail url, ignoring its query string.
+        """
+        parts = urlsplit(url)
+        return hashlib.sha1(
+            ("%s://%s%s" % (parts.scheme, parts.netloc, parts.path)).encode("utf-8")
+        ).hexdigest()
+
+    def _get_path(self, key):
+        """
+        Returns the path a thumbnail is cached at. Thumbnails are spread over
+        sub folders so that no folder holds too many files.
+        """
+        return os.path.join(self._cache_dir, key[:2], key)
+
+    def _touch(self, key, path):
+        """
+        Marks a thumbnail as recently used. Access times are also stored as the
+        modification time of the file, so that they are kept between sessions.
+        This must be called with the lock held.
+        """
+        self._entries[key] = self._entries.pop(key)
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _load_entries(self):
+        """
+        Reads the thumbnails already cached on disk, the first time the cache
+        is used. This must be called with the lock held.
+        """
+        if self._entries is not None:
+            return
+
+        self._entries = collections.OrderedDict()
+        self._total_size = 0
+        if not os.path.isdir(self._cache_dir):
+            return
+
+        found = []
+        for folder in os.listdir(self._cache_dir):
+            folder_path = os.path.join(self._cache_dir, folder)
+            if not os.path.isdir(folder_path):
+                continue
+            for key in os.listdir(folder_path):
+                if key.endswith(".tmp"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(folder_path, key))
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, key, stat.st_size))
+
+        for (_, key, size) in sorted(found):
+            self._entries[key] = size
+            self._total_size += size
+        self._evict()
+
+    def _evict(self):
+        """
+        Removes the least recently used thumbnails until the cache fits in its
+        maximum size. This must be called with the lock held.
+        """
+        while self._entries and self._total_size > self._max_size:
+            (key, size) = self._entries.popitem(last=False)
+            self._total_size -= size
+            self._evictions += 1
+            try:
+                os.remove(self._get_path(key))
+            except OSError:
+                pass
+
+
+# the thumbnail cache, shared by all the items and kept for the whole session
+g_thumbnail_cache = None
+
+
+def get_thumbnail_cache():
+    """
+    Returns the thumbnail cache, configured with the current app settings.
+
+    :returns: :class:`ThumbnailCache` instance
+    """
+    global g_thumbnail_cache
+    app = sgtk.platform.current_bundle()
+    cache_dir = os.path.join(app.cache_location, "thumbnails")
+    max_size = app.get_setting("thumbnail_cache_size") * 1024 * 1024
+    if g_thumbnail_cache is None:
+        g_thumbnail_cache = ThumbnailCache(cache_dir, max_size)
+    else:
+        g_thumbnail_cache.configure(cache_dir, max_size)
+    return g_thumbnail_cache
+
+
+def download_thumbnail(url):
+    """
+    Returns the local path of a Shotgun thumbnail, going through the shared
+    thumbnail cache. This is typically run in a worker thread.
+
+    :param str url: Url of the thumbnail
+    :returns: Path to the thumbnail, None if it couldn't be downloaded
+    """
+    app = sgtk.platform.current_bundle()
+    try:
+        return get_thumbnail_cache().get_thumbnail(
+            url, lambda url, path: sgtk.util.download_url(app.shotgun, url, path)
+        )
+    except Exception as e:
+        app.log_debug("Could not download thumbnail %s: %s" % (url, e))
+        return None
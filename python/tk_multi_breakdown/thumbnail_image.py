@@ -0,0 +1,111 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import threading
+import collections
+
+from sgtk.platform.qt import QtCore, QtGui
+
+# size thumbnails are displayed at in the list
+THUMBNAIL_WIDTH = 60
+THUMBNAIL_HEIGHT = 40
+
+# maximum number of scaled thumbnails kept in memory
+IMAGE_CACHE_SIZE = 1000
+
+
+class ThumbnailImageCache(object):
+    """
+    Bounded cache of the thumbnails decoded and scaled to their display size,
+    keyed by the path of their source image.
+
+    Images are decoded and scaled as QImage, which unlike QPixmap can be used
+    outside of the main thread. The main thread only has to wrap the ready
+    sized image into a pixmap.
+    """
+
+    def __init__(self, max_size=IMAGE_CACHE_SIZE):
+        """
+        Construction
+
+        :param int max_size: Maximum number of images held by the cache
+        """
+        self._images = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._max_size = max_size
+
+    def get_image(self, path):
+        """
+        Returns a thumbnail decoded and scaled to the display size, centered on a
+        transparent canvas. This is typically run in a worker thread.
+
+        :param str path: Path of the source image
+        :returns: QImage of the display size. Images which can't be decoded
+                  give an empty, transparent image.
+        """
+        with self._lock:
+            image = self._images.pop(path, None)
+            if image is not None:
+                self._images[path] = image
+                return image
+
+        image = self._render(path)
+
+        with self._lock:
+            self._images[path] = image
+            while len(self._images) > self._max_size:
+                self._images.popitem(last=False)
+        return image
+
+    def _render(self, path):
+        """
+        Decodes and scales an image onto a transparent canvas of the display size.
+        """
+        canvas = QtGui.QImage(
+            THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT, QtGui.QImage.Format_ARGB32_Premultiplied
+        )
+        canvas.fill(QtCore.Qt.transparent)
+
+        image = QtGui.QImage(path)
+        if image.isNull():
+            return canvas
+
+        # scale the image down to fit
+        if image.width() > THUMBNAIL_WIDTH or image.height() > THUMBNAIL_HEIGHT:
+            image = image.scaled(
+                THUMBNAIL_WIDTH,
+                THUMBNAIL_HEIGHT,
+                QtCore.Qt.KeepAspectRatio,
+                QtCore.Qt.SmoothTransformation,
+            )
+
+        painter = QtGui.QPainter(canvas)
+        painter.drawImage(
+            (THUMBNAIL_WIDTH - image.width()) // 2,
+            (THUMBNAIL_HEIGHT - image.height()) // 2,
+            image,
+        )
+        painter.end()
+        return canvas
+
+
+# the scaled thumbnails, shared by all the items and kept for the whole session
+g_thumbnail_image_cache = ThumbnailImageCache()
+
+
+def get_thumbnail_image(path):
+    """
+    Returns a thumbnail decoded and scaled to the display size, using the shared
+    :class:`ThumbnailImageCache`. This is typically run in a worker thread.
+
+    :param str path: Path of the source image
+    :returns: QImage of the display size
+    """
+    return g_thumbnail_image_cache.get_image(path)
@@ -0,0 +1,157 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import time
+import uuid
+import threading
+import contextlib
+import collections
+
+# maximum number of spans kept, the oldest ones are discarded first
+MAX_SPANS = 10000
+
+
+class SpanRecorder(object):
+    """
+    Records timing spans around the phases of the breakdown.
+
+    Each span is tagged with a correlation id, shared by all the spans of the
+    same scene analysis or update, so the time spent in each phase can be
+    broken down per operation. Spans can be recorded from any thread.
+    """
+
+    def __init__(self, max_spans=MAX_SPANS):
+        """
+        Construction
+
+        :param int max_spans: Maximum number of spans kept
+        """
+        self._spans = collections.deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._last_id = None
+
+    @property
+    def last_id(self):
+        """
+        The last correlation id created, None if no ids were created yet.
+        """
+        return self._last_id
+
+    def new_id(self, prefix="scan"):
+        """
+        Creates a new correlation id.
+
+        :param str prefix: Prefix of the id, describing the operation
+        :returns: The correlation id
+        """
+        correlation_id = "%s-%s" % (prefix, uuid.uuid4().hex[:8])
+        self._last_id = correlation_id
+        return correlation_id
+
+    @contextlib.contextmanager
+    def span(self, phase, correlation_id=None, **info):
+        """
+        Context manager recording the time spent in its block.
+
+        :param str phase: Name of the phase timed, for example scan or query
+        :param str correlation_id: Id of the operation the phase is part of
+        :param info: Additional values stored in the span, for example the
+                     number of items processed
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            span = {
+                "phase": phase,
+                "id": correlation_id,
+                "start": start,
+                "duration": time.time() - start,
+                "thread": threading.current_thread().name,
+            }
+            span.update(info)
+            with self._lock:
+                self._spans.append(span)
+
+    def get_spans(self, correlation_id=None, phase=None):
+        """
+        Returns the recorded spans, oldest first.
+
+        :param str correlation_id: Only return the spans of this operation
+        :param str phase: Only return the spans of this phase
+        :returns: List of dictionaries with phase, id, start, duration and
+                  thread keys, plus the additional values of the span
+        """
+        with self._lock:
+            spans = list(self._spans)
+        return [
+            dict(span)
+            for span in spans
+            if (correlation_id is None or span["id"] == correlation_id)
+            and (phase is None or span["phase"] == phase)
+        ]
+
+    def get_summary(self, correlation_id=None):
+        """
+        Returns the time spent per phase.
+
+        :param str correlation_id: Only summarize the spans of this operation
+        :returns: Dictionary keyed by phase, each value being a dictionary with
+                  count, total and max durations keys
+        """
+        summary = collections.OrderedDict()
+        for span in self.get_spans(correlation_id):
+            phase = summary.setdefault(
+                span["phase"], {"count": 0, "total": 0.0, "max": 0.0}
+            )
+            phase["count"] += 1
+            phase["total"] += span["duration"]
+            phase["max"] = max(phase["max"], span["duration"])
+        return summary
+
+    def log_summary(self, app, correlation_id):
+        """
+        Writes the time spent per phase of an operation to the engine log.
+
+        :param app: The breakdown app instance
+        :param str correlation_id: Id of the operation to summarize
+        """
+        summary = self.get_summary(correlation_id)
+        app.log_info(
+            "Breakdown timings for %s: %s"
+            % (
+                correlation_id,
+                ", ".join(
+                    "%s %.3fs (%d spans, max %.3fs)"
+                    % (phase, values["total"], values["count"], values["max"])
+                    for (phase, values) in summary.items()
+                ),
+            )
+        )
+
+    def clear(self):
+        """
+        Discards all the recorded spans.
+        """
+        with self._lock:
+            self._spans.clear()
+
+
+# the spans recorded during the session
+g_span_recorder = SpanRecorder()
+
+
+def get_span_recorder():
+    """
+    Returns the recorder of the timing spans.
+
+    :returns: :class:`SpanRecorder` instance
+    """
+    return g_span_recorder
@@ -35,4 +35,9 @@ class ThumbnailLabel(QtGui.QLabel):
         
         # and finally assign it
         QtGui.QLabel.setPixmap(self, rendered_pixmap)
+
+    def set_image(self, image):
+        # the image is already scaled and centered on a 60x40 canvas, only
+        # wrap it into a pixmap
+        QtGui.QLabel.setPixmap(self, QtGui.QPixmap.fromImage(image))
         
@@ -52,6 +52,24 @@ class BreakdownSceneOperations(Hook):
             }
         )
 
+        # benchmarks can request larger scenes, made of nodes pointing at
+        # the same publish and of nodes outside of the template system.
+        # synthetic scenes spread their nodes over a number of generated
+        # publishes instead, given as a path pattern taking the publish index
+        publish_pattern = os.environ.get("TEST_SCENE_PUBLISH_PATTERN")
+        publish_count = int(os.environ.get("TEST_SCENE_PUBLISH_COUNT", 1))
+        for i in range(int(os.environ.get("TEST_SCENE_NODE_COUNT", 0))):
+            if publish_pattern:
+                if i % 5 == 0:
+                    path = "/foo/bar_%d" % (i % 100)
+                else:
+                    path = publish_pattern % (i % publish_count)
+            elif i % 2:
+                path = os.environ["TEST_PATH_1"]
+            else:
+                path = "/foo/bar_%d" % i
+            nodes.append({"node": "node_%d" % i, "type": "TestNode", "path": path})
+
         return nodes
 
     def update(self, items):
@@ -0,0 +1,351 @@
+# Copyright (c) 2013 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import time
+import unittest
+import threading
+
+from test_breakdown import TestApplication
+
+
+@unittest.skipUnless(
+    os.environ.get("TK_BREAKDOWN_BENCHMARKS"),
+    "Benchmarks only run when TK_BREAKDOWN_BENCHMARKS is set",
+)
+class BenchmarkTestBase(TestApplication):
+    """
+    Base class of the benchmarks, which are slow and only run on demand by
+    setting the TK_BREAKDOWN_BENCHMARKS environment variable.
+    """
+
+    def setUp(self):
+        """
+        Fixtures setup
+        """
+        super(BenchmarkTestBase, self).setUp()
+
+        # short hand for the app
+        self.app = self.engine.apps["tk-multi-breakdown"]
+        self.tk_multi_breakdown = self.app.import_module("tk_multi_breakdown")
+
+        self.publish_folder = os.path.join(
+            self.project_root,
+            "sequences",
+            self.seq["code"],
+            self.shot["code"],
+            self.step["short_name"],
+            "publish",
+        )
+        self.test_path_1 = os.path.join(self.publish_folder, "foo.v003.ma")
+        fh = open(self.test_path_1, "wt")
+        fh.write("hello")
+        fh.close()
+
+        # this will be read by our hook so push
+        # it out into env vars...
+        os.environ["TEST_PATH_1"] = self.test_path_1
+
+
+class TestScanBenchmark(BenchmarkTestBase):
+    """
+    Benchmarks showing how the scene analysis scales with the number of nodes
+    """
+
+    # number of nodes in each of the benchmarked scenes
+    NODE_COUNTS = [100, 1000, 10000]
+
+    def tearDown(self):
+        """
+        Fixtures teardown
+        """
+        os.environ.pop("TEST_SCENE_NODE_COUNT", None)
+        super(TestScanBenchmark, self).tearDown()
+
+    def test_analyze_scene_scaling(self):
+        """
+        Times the scene analysis for growing scenes
+        """
+        timings = []
+        for node_count in self.NODE_COUNTS:
+            os.environ["TEST_SCENE_NODE_COUNT"] = str(node_count)
+
+            start = time.time()
+            scene_data = self.app.analyze_scene()
+            elapsed = time.time() - start
+
+            # the two default fixture nodes plus the generated ones
+            self.assertEqual(len(scene_data), node_count + 2)
+            timings.append((node_count, elapsed))
+
+        for (node_count, elapsed) in timings:
+            print(
+                "analyze_scene: %6d nodes in %.3fs (%.1fus per node)"
+                % (node_count, elapsed, elapsed * 1e6 / node_count)
+            )
+
+
+class TestSyntheticSceneBenchmark(BenchmarkTestBase):
+    """
+    Benchmarks of the breakdown core on synthetic scenes.
+
+    Each scene is made of nodes spread over generated publishes, each publish
+    having a few versions on disk and a publish record in the mocked Shotgun,
+    plus some nodes outside of the template system. The scene analysis, the
+    version resolution and the updates are timed, and the Shotgun calls made
+    by each of them are counted, so that scaling regressions show up as numbers.
+    """
+
+    # number of nodes in each of the benchmarked scenes
+    NODE_COUNTS = [10, 1000, 10000, 50000]
+
+    # number of nodes referencing each generated publish
+    NODES_PER_PUBLISH = 10
+
+    # versions generated on disk for each publish, the scene using the
+    # second to last one
+    VERSIONS = [1, 2, 3]
+
+    # shotgun methods counted
+    SHOTGUN_METHODS = ["find", "find_one", "batch", "create", "update", "summarize"]
+
+    def setUp(self):
+        """
+        Fixtures setup
+        """
+        super(TestSyntheticSceneBenchmark, self).setUp()
+
+        self.publish_type = {"type": "PublishedFileType", "id": 1, "code": "Maya Scene"}
+        self.add_to_sg_mock_db([self.publish_type])
+        self._publish_count = 0
+
+        # the default fixture node, and the publish pattern used by the
+        # generated nodes
+        os.environ["TEST_PATH_1"] = self._get_publish_path(0, self.VERSIONS[-2])
+        os.environ["TEST_SCENE_PUBLISH_PATTERN"] = os.path.join(
+            self.publish_folder, "bench%%d.v%03d.ma" % self.VERSIONS[-2]
+        )
+
+        self._count_shotgun_calls()
+
+    def tearDown(self):
+        """
+        Fixtures teardown
+        """
+        for name in [
+            "TEST_SCENE_NODE_COUNT",
+            "TEST_SCENE_PUBLISH_COUNT",
+            "TEST_SCENE_PUBLISH_PATTERN",
+        ]:
+            os.environ.pop(name, None)
+        super(TestSyntheticSceneBenchmark, self).tearDown()
+
+    def _count_shotgun_calls(self):
+        """
+        Wraps the mocked Shotgun methods to count the calls made to them.
+        """
+        self.shotgun_calls = 0
+
+        def counted(method):
+            def wrapper(*args, **kwargs):
+                self.shotgun_calls += 1
+                return method(*args, **kwargs)
+
+            return wrapper
+
+        for name in self.SHOTGUN_METHODS:
+            setattr(self.mockgun, name, counted(getattr(self.mockgun, name)))
+
+    def _get_publish_path(self, index, version):
+        """
+        Returns the path of a version of a generated publish.
+        """
+        return os.path.join(self.publish_folder, "bench%d.v%03d.ma" % (index, version))
+
+    def _generate_publishes(self, publish_count):
+        """
+        Generates the publishes the scene nodes point at: their versions on disk
+        and a publish record in Shotgun for the version used in the scene.
+        Publishes generated for a previous scene are reused.
+        """
+        records = []
+        for index in range(self._publish_count, publish_count):
+            for version in self.VERSIONS:
+                fh = open(self._get_publish_path(index, version), "wt")
+                fh.write("hello")
+                fh.close()
+
+            version = self.VERSIONS[-2]
+            records.append(
+                {
+                    "type": "PublishedFile",
+                    "id": 1000 + index,
+                    "code": "bench%d.v%03d.ma" % (index, version),
+                    "name": "bench%d" % index,
+                    "version_number": version,
+                    "path_cache": "%s/sequences/%s/%s/%s/publish/bench%d.v%03d.ma"
+                    % (
+                        self.project_name,
+                        self.seq["code"],
+                        self.shot["code"],
+                        self.step["short_name"],
+                        index,
+                        version,
+                    ),
+                    "path_cache_storage": self.primary_storage,
+                    "entity": self.shot,
+                    "task": self.task,
+                    "published_file_type": self.publish_type,
+                    "project": self.project,
+                    "image": None,
+                }
+            )
+
+        if records:
+            self.add_to_sg_mock_db(records)
+        self._publish_count = max(self._publish_count, publish_count)
+
+    def _reset_caches(self):
+        """
+        Discards the caches filled by the previous scene, so that every scene
+        is benchmarked from a cold start.
+        """
+        self.tk_multi_breakdown.get_publish_cache().invalidate()
+        self.tk_multi_breakdown.get_directory_cache().clear()
+
+    def _measure(self, fn):
+        """
+        Runs a function, measuring its duration and the Shotgun calls it makes.
+
+        :returns: Tuple with the function result, its duration and its number
+                  of Shotgun calls
+        """
+        self.shotgun_calls = 0
+        start = time.time()
+        result = fn()
+        return (result, time.time() - start, self.shotgun_calls)
+
+    def test_synthetic_scene_scaling(self):
+        """
+        Times the scene analysis, version resolution and updates for growing
+        synthetic scenes
+        """
+        results = []
+        for node_count in self.NODE_COUNTS:
+            publish_count = max(1, node_count // self.NODES_PER_PUBLISH)
+            self._generate_publishes(publish_count)
+            self._reset_caches()
+            os.environ["TEST_SCENE_NODE_COUNT"] = str(node_count)
+            os.environ["TEST_SCENE_PUBLISH_COUNT"] = str(publish_count)
+
+            (items, scan_time, scan_calls) = self._measure(
+                self.tk_multi_breakdown.get_breakdown_items
+            )
+            # the two default fixture nodes plus the generated ones
+            self.assertEqual(len(items), node_count + 2)
+
+            published_items = [item for item in items if item["sg_data"]]
+            (latest_versions, version_time, version_calls) = self._measure(
+                lambda: self.app.compute_highest_versions(published_items)
+            )
+            # all the generated publishes are found and resolved on disk,
+            # without any Shotgun query
+            self.assertTrue(published_items)
+            self.assertEqual(set(latest_versions), set([self.VERSIONS[-1]]))
+            self.assertEqual(version_calls, 0)
+
+            def update_items():
+                for (item, latest_version) in zip(published_items, latest_versions):
+                    fields = dict(item["fields"])
+                    fields["version"] = latest_version
+                    self.app.update_item(
+                        item["node_type"], item["node_name"], item["template"], fields
+                    )
+
+            (_, update_time, update_calls) = self._measure(update_items)
+
+            results.append(
+                (
+                    node_count,
+                    len(published_items),
+                    scan_time,
+                    scan_calls,
+                    version_time,
+                    version_calls,
+                    update_time,
+                    update_calls,
+                )
+            )
+
+        print(
+            "\n%8s %9s | %9s %8s | %9s %8s | %9s %8s"
+            % (
+                "nodes",
+                "published",
+                "scan (s)",
+                "sg calls",
+                "versions",
+                "sg calls",
+                "updates",
+                "sg calls",
+            )
+        )
+        for result in results:
+            print("%8d %9d | %9.3f %8d | %9.3f %8d | %9.3f %8d" % result)
+
+    def test_chunk_version_workers(self):
+        """
+        Times the version resolution of the streamed chunks for growing numbers
+        of status workers, as set by the status_worker_count setting
+        """
+        node_count = 10000
+        publish_count = node_count // self.NODES_PER_PUBLISH
+        self._generate_publishes(publish_count)
+        os.environ["TEST_SCENE_NODE_COUNT"] = str(node_count)
+        os.environ["TEST_SCENE_PUBLISH_COUNT"] = str(publish_count)
+
+        chunks = [
+            [item for item in chunk if item["sg_data"]]
+            for chunk in self.tk_multi_breakdown.iter_breakdown_items()
+        ]
+
+        breakdown = self.tk_multi_breakdown.breakdown
+        results = []
+        for worker_count in [1, 2, 4, 8]:
+            self.tk_multi_breakdown.get_directory_cache().clear()
+            pending_chunks = list(chunks)
+            versions = []
+            lock = threading.Lock()
+
+            def work():
+                while True:
+                    with lock:
+                        if not pending_chunks:
+                            return
+                        chunk = pending_chunks.pop()
+                    chunk_versions = breakdown.compute_chunk_versions(self.app, chunk)
+                    with lock:
+                        versions.extend(chunk_versions)
+
+            threads = [threading.Thread(target=work) for _ in range(worker_count)]
+            start = time.time()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            results.append((worker_count, len(chunks), time.time() - start))
+
+            # all the versions are resolved regardless of the number of workers
+            self.assertEqual(len(versions), sum(len(chunk) for chunk in chunks))
+            self.assertEqual(set(versions), set([self.VERSIONS[-1]]))
+
+        print("\n%8s %8s %9s" % ("workers", "chunks", "versions"))
+        for result in results:
+            print("%8d %8d %9.3f" % result)
@@ -9,6 +9,11 @@
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
 import os
+import sys
+import glob
+import json
+import types
+import datetime
 
 from tank_test.tank_test_base import *
 import sgtk
@@ -190,6 +195,339 @@ class TestApi(TestApplication):
             item["fields"],
         )
 
+    def test_compute_highest_versions(self):
+        """
+        Tests the bulk version computation logic
+        """
+        item = self._get_templated_item()
+        bad_item = {
+            "template": self.tk.templates["maya_asset_publish"],
+            "fields": item["fields"],
+        }
+        # the same item twice should only be scanned once but resolve for both
+        self.assertEqual(
+            self.app.compute_highest_versions([item, bad_item, item]), [4, None, 4]
+        )
+        self.assertEqual(self.app.compute_highest_versions([]), [])
+
+    def test_compute_highest_published_versions(self):
+        """
+        Tests that publishes outside the template system are resolved in bulk
+        like they are one by one
+        """
+        asset = {"type": "Asset", "id": self.shot["id"], "code": "asset_code"}
+        publish_type = {"type": "PublishedFileType", "id": 1, "code": "Maya Scene"}
+        self.add_to_sg_mock_db([dict(asset, project=self.project), publish_type])
+
+        # publishes of the same name are linked to a shot and to an asset
+        # sharing the same id, or to nothing, with and without a type. there
+        # are more names than fit in a single Shotgun filter
+        records = []
+        sg_data_list = []
+        for index in range(630):
+            publish = {
+                "type": "PublishedFile",
+                "project": self.project,
+                "entity": [self.shot, asset, None][index % 3],
+                "task": None,
+                "published_file_type": [publish_type, None][index % 2],
+                "name": "publish_%d" % (index // 3),
+            }
+            for version in range(1, 2 + index % 4):
+                records.append(
+                    dict(publish, id=1000 + len(records), version_number=version)
+                )
+            sg_data_list.append(dict(records[-1], version_number=1))
+        self.add_to_sg_mock_db(records)
+
+        items = [
+            {"template": None, "fields": None, "sg_data": sg_data}
+            for sg_data in sg_data_list
+        ]
+        self.assertEqual(
+            self.app.compute_highest_versions(items),
+            [
+                self.app.execute_hook(
+                    "hook_get_version_number",
+                    template=None,
+                    curr_fields=None,
+                    sg_data=sg_data,
+                )
+                for sg_data in sg_data_list
+            ],
+        )
+        self.assertEqual(self.app.compute_highest_versions(items)[:4], [1, 2, 3, 4])
+
+    def test_directory_cache(self):
+        """
+        Tests that cached globs return the same paths as glob.glob()
+        """
+        tk_multi_breakdown = self.app.import_module("tk_multi_breakdown")
+        cache = tk_multi_breakdown.directory_cache.DirectoryListingCache()
+
+        root = os.path.join(self.tank_temp, "directory_cache")
+        for folder in ["a/v001", "a/v002", "b/v001", ".hidden/v001"]:
+            os.makedirs(os.path.join(root, folder))
+            open(os.path.join(root, folder, "f.ma"), "w").close()
+
+        patterns = [
+            "*/v*/f.ma",
+            "a/*/f.ma",
+            "*/v001",
+            "a/v001/f.ma",
+            "c/*",
+            ".*/*",
+        ]
+        for pattern in patterns:
+            pattern = os.path.join(root, pattern)
+            self.assertEqual(sorted(cache.glob(pattern)), sorted(glob.glob(pattern)))
+
+        # wildcards directly under the root of the file system
+        pattern = os.path.join(os.path.abspath(os.sep), "*")
+        self.assertEqual(sorted(cache.glob(pattern)), sorted(glob.glob(pattern)))
+
+        # directories are only listed again once modified
+        misses = cache.stats()["misses"]
+        cache.glob(os.path.join(root, "*", "v*", "f.ma"))
+        self.assertEqual(cache.stats()["misses"], misses)
+        self.assertTrue(cache.stats()["hits"])
+
+    def test_paths_from_template(self):
+        """
+        Tests that the cached paths_from_template() matches the core API
+        """
+        tk_multi_breakdown = self.app.import_module("tk_multi_breakdown")
+        item = self._get_templated_item()
+        template = item["template"]
+
+        for skip_keys in [["version"], ["version", "eye"], ["version", "name"], []]:
+            self.assertEqual(
+                sorted(
+                    tk_multi_breakdown.paths_from_template(
+                        template, item["fields"], skip_keys=skip_keys
+                    )
+                ),
+                sorted(
+                    self.tk.paths_from_template(
+                        template, item["fields"], skip_keys=skip_keys
+                    )
+                ),
+            )
+
+    def test_template_matcher(self):
+        """
+        Tests that the template matcher returns the same results as the core API
+        """
+        tk_multi_breakdown = self.app.import_module("tk_multi_breakdown")
+        matcher = tk_multi_breakdown.get_template_matcher(self.tk)
+
+        paths = [self.test_path_1, self.test_path_2, "/foo/bar", self.project_root]
+        # match twice, so that the memoized results are checked as well
+        for path in paths + paths:
+            self.assertEqual(
+                matcher.template_from_path(path), self.tk.template_from_path(path)
+            )
+        self.assertEqual(matcher.stats()["hits"], len(paths) + 1)
+
+        # the memo is bounded
+        bounded_matcher = tk_multi_breakdown.template_matcher.TemplateMatcher(
+            self.tk, max_size=2
+        )
+        for path in paths:
+            bounded_matcher.template_from_path(path)
+        self.assertEqual(bounded_matcher.stats()["size"], 2)
+
+        # static text in optional sections is not part of the prefix
+        template = sgtk.TemplatePath(
+            "breakdown_test[/static_{Shot}]/{name}.v{version}.ma",
+            self.tk.templates["maya_shot_publish"].keys,
+            self.project_root,
+        )
+        index = tk_multi_breakdown.template_matcher.TemplatePrefixIndex([template])
+        for path in [
+            os.path.join(self.project_root, "breakdown_test", "foo.v001.ma"),
+            os.path.join(
+                self.project_root, "breakdown_test", "static_shot", "foo.v001.ma"
+            ),
+        ]:
+            self.assertTrue(template.validate(path))
+            self.assertEqual(index.get_candidates(path), [template])
+
+    def test_publish_cache(self):
+        """
+        Tests the eviction, expiry and invalidation of the publish cache
+        """
+        tk_multi_breakdown = self.app.import_module("tk_multi_breakdown")
+        cache = tk_multi_breakdown.publish_cache.PublishCache(max_size=2, ttl=600)
+
+        # the least recently used entry is evicted first
+        cache.set(1, "/a", {"id": 1})
+        cache.set(1, "/b", {"id": 2})
+        self.assertEqual(cache.get(1, "/a"), {"id": 1})
+        cache.set(1, "/c", {"id": 3})
+        self.assertEqual(cache.get(1, "/b"), None)
+        self.assertEqual(cache.get(1, "/a"), {"id": 1})
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        # entries are namespaced
+        self.assertEqual(cache.get(2, "/a"), None)
+        cache.invalidate(2)
+        self.assertEqual(cache.get(1, "/a"), {"id": 1})
+        cache.invalidate(1)
+        self.assertEqual(cache.stats()["size"], 0)
+
+        # expired entries are discarded
+        cache.configure(max_size=2, ttl=-1, miss_ttl=60)
+        cache.set(1, "/a", {"id": 1})
+        self.assertEqual(cache.get(1, "/a"), None)
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_missing_publishes(self):
+        """
+        Tests that paths without a publish are only looked up in Shotgun once
+        """
+        tk_multi_breakdown = self.app.import_module("tk_multi_breakdown")
+        tk_multi_breakdown.get_publish_cache().invalidate()
+
+        queries = []
+        find = self.mockgun.find
+
+        def counted_find(*args, **kwargs):
+            queries.append(args[0])
+            return find(*args, **kwargs)
+
+        self.mockgun.find = counted_find
+
+        # none of the scene paths are published
+        scene_data = self.app.analyze_scene()
+        self.assertTrue(queries)
+        for item in scene_data:
+            self.assertEqual(item["sg_data"], None)
+
+        del queries[:]
+        self.app.analyze_scene()
+        self.assertEqual(queries, [])
+        self.assertTrue(tk_multi_breakdown.get_publish_cache().stats()["negative_hits"])
+
+        # missing entries expire after their own ttl
+        cache = tk_multi_breakdown.publish_cache.PublishCache(ttl=600, miss_ttl=-1)
+        cache.set_missing(1, "/a")
+        self.assertEqual(cache.get(1, "/a"), None)
+        cache.configure(max_size=10, ttl=600, miss_ttl=600)
+        cache.set_missing(1, "/a")
+        self.assertTrue(cache.get(1, "/a") is tk_multi_breakdown.publish_cache.MISSING)
+
+    def test_persistent_publish_cache(self):
+        """
+        Tests that stored publishes are revalidated against Shotgun
+        """
+        tk_multi_breakdown = self.app.import_module("tk_multi_breakdown")
+        cache = tk_multi_breakdown.persistent_publish_cache.PersistentPublishCache(
+            os.path.join(self.tank_temp, "publish_cache", "publishes.sqlite")
+        )
+
+        publishes = [
+            {
+                "type": "PublishedFile",
+                "id": publish_id,
+                "code": "foo.v%03d.ma" % publish_id,
+                "project": self.project,
+                "updated_at": datetime.datetime(2020, 1, 1),
+                "image": None,
+            }
+            for publish_id in (3, 4)
+        ]
+        self.add_to_sg_mock_db(publishes)
+
+        cache.store(
+            self.app,
+            1,
+            [
+                (path, {"type": "PublishedFile", "id": p["id"]}, p["updated_at"])
+                for (path, p) in zip(["/a", "/b"], publishes)
+            ],
+        )
+        stored_data = cache.load(self.app, 1, ["/a", "/b", "/c"])
+        self.assertEqual(sorted(stored_data), ["/a", "/b"])
+        self.assertEqual(cache.load(self.app, 2, ["/a"]), {})
+
+        # publishes updated since they were stored are discarded
+        self.add_to_sg_mock_db(
+            [dict(publishes[1], updated_at=datetime.datetime(2020, 1, 2))]
+        )
+        self.assertEqual(list(cache.load(self.app, 1, ["/a", "/b"])), ["/a"])
+        self.assertEqual(cache.load(self.app, 1, ["/b"]), {})
+        self.assertEqual(cache.stats()["stale"], 1)
+
+    def test_thumbnail_cache(self):
+        """
+        Tests that thumbnails are downloaded once and evicted when the cache is full
+        """
+        tk_multi_breakdown = self.app.import_module("tk_multi_breakdown")
+        cache = tk_multi_breakdown.thumbnail_cache.ThumbnailCache(
+            os.path.join(self.tank_temp, "thumbnails"), max_size=20
+        )
+
+        downloads = []
+
+        def download(url, path):
+            downloads.append(url)
+            with open(path, "w") as f:
+                f.write("x" * 10)
+
+        # signed urls only differ by their query string
+        path = cache.get_thumbnail("https://sg/thumb/1.jpg?sig=a", download)
+        self.assertEqual(
+            cache.get_thumbnail("https://sg/thumb/1.jpg?sig=b", download), path
+        )
+        self.assertEqual(len(downloads), 1)
+
+        cache.get_thumbnail("https://sg/thumb/2.jpg", download)
+        cache.get_thumbnail("https://sg/thumb/3.jpg", download)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["bytes"], 20)
+
+    def test_generate_report(self):
+        """
+        Tests the headless report
+        """
+        sgtk._hook_items = None
+        report = self.app.generate_report()
+
+        self.assertEqual(len(report["items"]), len(self.app.analyze_scene()))
+        summary = report["summary"]
+        self.assertEqual(
+            summary["total"],
+            summary["up_to_date"]
+            + summary["out_of_date"]
+            + summary["unpublished"]
+            + summary["unresolved"],
+        )
+        # nothing is updated unless requested
+        self.assertEqual(summary["updated"], 0)
+        self.assertEqual(sgtk._hook_items, None)
+
+        # the report is serialized as compact JSON
+        tk_multi_breakdown = self.app.import_module("tk_multi_breakdown")
+        self.assertEqual(
+            json.loads(tk_multi_breakdown.format_report(report)), report
+        )
+
+    def test_timing_spans(self):
+        """
+        Tests that the phases of the scene analysis are timed
+        """
+        scan_id = self.app.analyze_scene()[0]["scan_id"]
+
+        spans = self.app.get_timing_spans(scan_id)
+        self.assertEqual(
+            [span["phase"] for span in spans], ["scan", "match", "query"]
+        )
+        self.assertEqual(
+            list(self.app.get_timing_summary().keys()), ["scan", "match", "query"]
+        )
+
     def test_update(self):
         """
         Test scene update
@@ -214,3 +552,169 @@ class TestApi(TestApplication):
         self.assertEqual(sgtk._hook_items[0]["node"], "maya_publish")
         self.assertEqual(sgtk._hook_items[0]["path"], self.test_path_2)
         self.assertEqual(sgtk._hook_items[0]["type"], "TestNode")
+
+    def test_update_items(self):
+        """
+        Test bulk scene update
+        """
+        item = self._get_templated_item()
+        valid_item = dict(item, fields=dict(item["fields"], version=4))
+        missing_item = dict(item, fields=dict(item["fields"], version=5))
+        untemplated_item = dict(item, template=None, fields=None)
+
+        # clear temp location where hook writes to
+        sgtk._hook_items = None
+
+        results = self.app.update_items(
+            [valid_item, missing_item, untemplated_item, valid_item]
+        )
+
+        # a single hook call, with the valid items only
+        self.assertEqual(len(sgtk._hook_items), 2)
+        self.assertEqual(sgtk._hook_items[0]["path"], self.test_path_2)
+        self.assertEqual([r["updated"] for r in results], [True, False, False, True])
+        self.assertEqual(results[0]["path"], self.test_path_2)
+        self.assertEqual(results[0]["error"], None)
+        self.assertTrue(results[1]["error"])
+        self.assertEqual(results[2]["error"], "No template")
+
+    def _get_templated_item(self):
+        """
+        Returns the scene item of the maya publish, which matches a template.
+        """
+        for item in self.app.analyze_scene():
+            if item["node_name"] == "maya_publish":
+                return item
+
+
+class TestMayaSceneOperations(TestApplication):
+    """
+    Tests for the Maya scene operations hook, run against stubs of the
+    Maya modules
+    """
+
+    def setUp(self):
+        """
+        Fixtures setup
+        """
+        super(TestMayaSceneOperations, self).setUp()
+
+        # file texture node -> texture path
+        self.scene = {"A": "/old/a.tif", "B": "/old/b.tif", "C": "/new/c.tif"}
+        self.calls = []
+        scene = self.scene
+        calls = self.calls
+
+        class Plug(object):
+            def __init__(self, node):
+                self._node = node
+
+            def asString(self):
+                return scene[self._node]
+
+        class MSelectionList(object):
+            def __init__(self):
+                self._nodes = []
+
+            def clear(self):
+                self._nodes = []
+
+            def add(self, node):
+                if node not in scene:
+                    raise RuntimeError("No object matches name: %s" % node)
+                if node not in self._nodes:
+                    self._nodes.append(node)
+
+            def length(self):
+                return len(self._nodes)
+
+            def getDependNode(self, index):
+                return self._nodes[index]
+
+        class MFnDependencyNode(object):
+            def setObject(self, node):
+                self._node = node
+
+            def findPlug(self, name, want_networked):
+                return Plug(self._node)
+
+        def set_attr(attribute, value, type=None):
+            calls.append(("setAttr", attribute, value))
+            scene[attribute.split(".")[0]] = value
+
+        cmds = types.ModuleType("maya.cmds")
+        cmds.about = lambda batch=False: True
+        cmds.undoInfo = lambda **kwargs: calls.append(("undoInfo", kwargs))
+        cmds.file = lambda path, loadReference=None: calls.append(
+            ("file", path, loadReference)
+        )
+        cmds.setAttr = set_attr
+
+        om = types.ModuleType("maya.api.OpenMaya")
+        om.MSelectionList = MSelectionList
+        om.MFnDependencyNode = MFnDependencyNode
+
+        self.maya_modules = {
+            "maya": types.ModuleType("maya"),
+            "maya.cmds": cmds,
+            "maya.api": types.ModuleType("maya.api"),
+            "maya.api.OpenMaya": om,
+        }
+        self.previous_modules = dict(
+            (name, sys.modules.get(name)) for name in self.maya_modules
+        )
+        sys.modules.update(self.maya_modules)
+
+        app = self.engine.apps["tk-multi-breakdown"]
+        self.hook = app.create_hook_instance("{self}/tk-maya_scene_operations.py")
+
+    def tearDown(self):
+        """
+        Fixtures teardown
+        """
+        for (name, module) in self.previous_modules.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+        super(TestMayaSceneOperations, self).tearDown()
+
+    def test_update(self):
+        """
+        Tests that texture updates skip duplicate, missing and up to date nodes
+        """
+        self.hook.update(
+            [
+                {"node": "A", "type": "file", "path": "/new/a.tif"},
+                {"node": "A", "type": "file", "path": "/new/a.tif"},
+                {"node": "B", "type": "file", "path": "/new/b.tif"},
+                {"node": "C", "type": "file", "path": "/new/c.tif"},
+                {"node": "deleted", "type": "file", "path": "/new/d.tif"},
+                {"node": "refNode", "type": "reference", "path": "/new/ref.ma"},
+            ]
+        )
+
+        self.assertEqual(self.scene["A"], "/new/a.tif")
+        self.assertEqual(self.scene["B"], "/new/b.tif")
+        set_attr_calls = [call for call in self.calls if call[0] == "setAttr"]
+        self.assertEqual(
+            sorted(call[1] for call in set_attr_calls),
+            ["A.fileTextureName", "B.fileTextureName"],
+        )
+        self.assertIn(("file", "/new/ref.ma", "refNode"), self.calls)
+
+        # everything happens in a single undo chunk
+        self.assertEqual(
+            self.calls[0],
+            ("undoInfo", {"openChunk": True, "chunkName": "Scene Breakdown Update"}),
+        )
+        self.assertEqual(self.calls[-1], ("undoInfo", {"closeChunk": True}))
+
+    def test_texture_paths(self):
+        """
+        Tests that texture paths are returned per node
+        """
+        self.assertEqual(
+            self.hook._get_texture_paths(["B", "A", "B", "deleted"]),
+            {"A": "/old/a.tif", "B": "/old/b.tif"},
+        )